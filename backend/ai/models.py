@@ -1,6 +1,8 @@
 from django.db import models
 import uuid
 
+from resume.invalidation import InvalidatingQuerySet
+
 
 class AIChatLog(models.Model):
     """Log all AI chat interactions."""
@@ -10,6 +12,8 @@ class AIChatLog(models.Model):
     language = models.CharField(max_length=10, default='en')
     timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
     
+    objects = InvalidatingQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-timestamp']
         verbose_name = "AI Chat Log"
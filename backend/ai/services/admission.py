@@ -0,0 +1,462 @@
+"""
+Admission control for outbound model calls.
+
+Every call to the model goes through the AdmissionController, which
+
+- caps concurrent calls per process with a semaphore; callers queue for
+  at most AI_QUEUE_TIMEOUT seconds,
+- spends one token per call from a bucket refilled at AI_RATE_LIMIT_RPM,
+  matching the API quota, so bursts queue instead of hitting 429s; with
+  AI_RATE_LIMIT_SHARED the quota is counted in the cache and shared by
+  every process using it,
+- lets identical concurrent questions share a single upstream call: the
+  first caller makes the call and the others wait for its result,
+- fails calls immediately while the circuit breaker is open.
+
+Calls that cannot be admitted in time, or while the circuit is open, raise
+AdmissionRejected, which callers treat like an API failure.
+
+Sync and async callers share the same slots and in-flight calls. Threads
+block on a condition; coroutines wait on asyncio futures, so queued async
+callers hold no worker thread.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+from .circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+_registry_lock = threading.Lock()
+_controller = None
+
+
+class AdmissionRejected(Exception):
+    """The call could not be admitted before the queue timeout."""
+
+
+class CircuitOpen(AdmissionRejected):
+    """The circuit breaker is failing calls fast."""
+
+
+def question_key(language: str, message: str) -> Tuple[str, str]:
+    """Key under which identical questions are coalesced."""
+    return language, re.sub(r"\s+", " ", message).strip().lower()
+
+
+class _RateLimiter:
+    """Waits for try_take() to hand out a token, in threads or coroutines."""
+
+    def try_take(self) -> float:
+        """Take a token and return 0, or return the seconds until one is due."""
+        raise NotImplementedError
+
+    async def atry_take(self) -> float:
+        return self.try_take()
+
+    def take(self, deadline: float) -> bool:
+        """Take one token, waiting until `deadline` (monotonic) at most."""
+        while True:
+            wait = self.try_take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def atake(self, deadline: float) -> bool:
+        while True:
+            wait = await self.atry_take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class TokenBucket(_RateLimiter):
+    """In-process token bucket; `capacity` tokens refilled at `rate` per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+class CacheRateLimiter(_RateLimiter):
+    """Calls per minute counted in the cache, shared by all processes using it."""
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+
+    @staticmethod
+    def _window():
+        now = time.time()
+        window = int(now // 60)
+        return f"ai:admission:{window}", (window + 1) * 60 - now
+
+    def try_take(self) -> float:
+        from resume.invalidation import get_cache
+
+        cache = get_cache()
+        key, wait = self._window()
+        cache.add(key, 0, timeout=120)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Expired between add() and incr()
+            return self.try_take()
+        return 0.0 if count <= self.per_minute else wait
+
+    async def atry_take(self) -> float:
+        from resume.invalidation import get_cache
+
+        cache = get_cache()
+        key, wait = self._window()
+        await cache.aadd(key, 0, timeout=120)
+        try:
+            count = await cache.aincr(key)
+        except ValueError:
+            return await self.atry_take()
+        return 0.0 if count <= self.per_minute else wait
+
+
+class _Slots:
+    """
+    Semaphore that threads and coroutines can both wait on. A released slot
+    goes to a waiting coroutine first, through its event loop.
+    """
+
+    def __init__(self, count: int):
+        self._free = count
+        self._cond = threading.Condition(threading.Lock())
+        self._async_waiters = deque()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._free:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._free:
+                        return False
+            self._free -= 1
+            return True
+
+    async def acquire_async(self, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._free:
+                self._free -= 1
+                return True
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._cond:
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+
+    def release(self):
+        with self._cond:
+            while self._async_waiters:
+                loop, future = self._async_waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, future)
+                    return
+                except RuntimeError:
+                    # The waiter's event loop has closed
+                    continue
+            self._free += 1
+            self._cond.notify()
+
+    def _hand_over(self, future):
+        if future.done():
+            # Timed out or cancelled meanwhile; pass the slot on
+            self.release()
+        else:
+            future.set_result(True)
+
+
+class _Call:
+    """Result of an upstream call, shared with callers that asked the same."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        # (loop, future) of waiting coroutines
+        self._futures = []
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_error(self, error: BaseException):
+        self._error = error
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            futures, self._futures = self._futures, []
+        for loop, future in futures:
+            try:
+                loop.call_soon_threadsafe(self._resolve, future)
+            except RuntimeError:
+                # The waiter's event loop has closed
+                pass
+
+    @staticmethod
+    def _resolve(future):
+        if not future.done():
+            future.set_result(None)
+
+    def _outcome(self):
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def wait(self, timeout: float):
+        if not self._event.wait(timeout):
+            raise AdmissionRejected("Timed out waiting for an identical call in flight")
+        return self._outcome()
+
+    async def await_result(self, timeout: float):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._event.is_set():
+                return self._outcome()
+            waiter = (loop, loop.create_future())
+            self._futures.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected("Timed out waiting for an identical call in flight")
+        finally:
+            with self._lock:
+                if waiter in self._futures:
+                    self._futures.remove(waiter)
+        return self._outcome()
+
+
+class AdmissionController:
+    """See the module docstring."""
+
+    def __init__(self, max_concurrent: int, queue_timeout: float, rate_per_minute: float = 0,
+                 burst: Optional[int] = None, shared: bool = False, wait_timeout: float = 60,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.wait_timeout = wait_timeout
+        self._slots = _Slots(max_concurrent)
+        self._limiter = None
+        if rate_per_minute > 0:
+            if shared:
+                self._limiter = CacheRateLimiter(int(rate_per_minute))
+            else:
+                self._limiter = TokenBucket(rate_per_minute / 60, burst or max(int(rate_per_minute), 1))
+        self.breaker = breaker
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._in_flight_lock = threading.Lock()
+
+    def acquire(self):
+        """Wait for a free slot and a rate limit token, or raise AdmissionRejected."""
+        if self.breaker is not None and self.breaker.is_open:
+            raise CircuitOpen("AI circuit is open")
+        deadline = time.monotonic() + self.queue_timeout
+        if not self._slots.acquire(self.queue_timeout):
+            logger.warning("AI call rejected: too many calls in progress")
+            raise AdmissionRejected("Too many AI calls in progress")
+        try:
+            if self._limiter is not None and not self._limiter.take(deadline):
+                logger.warning("AI call rejected: rate limit")
+                raise AdmissionRejected("AI rate limit reached")
+            self._check_breaker()
+        except BaseException:
+            self.release()
+            raise
+
+    async def acquire_async(self):
+        """acquire() for coroutines, waiting without a thread."""
+        if self.breaker is not None and self.breaker.is_open:
+            raise CircuitOpen("AI circuit is open")
+        deadline = time.monotonic() + self.queue_timeout
+        if not await self._slots.acquire_async(self.queue_timeout):
+            logger.warning("AI call rejected: too many calls in progress")
+            raise AdmissionRejected("Too many AI calls in progress")
+        try:
+            if self._limiter is not None and not await self._limiter.atake(deadline):
+                logger.warning("AI call rejected: rate limit")
+                raise AdmissionRejected("AI rate limit reached")
+            self._check_breaker()
+        except BaseException:
+            self.release()
+            raise
+
+    def _check_breaker(self):
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpen("AI circuit is open")
+
+    def release(self):
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot around an upstream call."""
+        self.acquire()
+        with self._outcome():
+            yield
+
+    @contextmanager
+    def _outcome(self):
+        """Release the acquired slot after an upstream call and record how it went."""
+        try:
+            yield
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted or abandoned, neither success nor failure
+            if self.breaker is not None:
+                self.breaker.cancel()
+            raise
+        else:
+            if self.breaker is not None:
+                self.breaker.record_success()
+        finally:
+            self.release()
+
+    def _join(self, key: Optional[Hashable]) -> Tuple[_Call, bool]:
+        """The call for key, and whether this caller has to make it."""
+        if key is None:
+            return _Call(), True
+        with self._in_flight_lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                return call, False
+            call = self._in_flight[key] = _Call()
+            return call, True
+
+    def _leave(self, key: Optional[Hashable], call: _Call):
+        if key is None:
+            return
+        with self._in_flight_lock:
+            if self._in_flight.get(key) is call:
+                del self._in_flight[key]
+
+    def call(self, key: Optional[Hashable], func: Callable):
+        """
+        Run func() within a slot. Concurrent calls with the same key, unless
+        it is None, share the first caller's result or error.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            return call.wait(self.wait_timeout)
+        try:
+            self.acquire()
+            with self._outcome():
+                result = func()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_error(e)
+            raise
+        finally:
+            self._leave(key, call)
+
+    async def acall(self, key: Optional[Hashable], func: Callable):
+        """call() for a coroutine function; waits on the event loop."""
+        call, leader = self._join(key)
+        if not leader:
+            return await call.await_result(self.wait_timeout)
+        try:
+            await self.acquire_async()
+            with self._outcome():
+                result = await func()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_error(e)
+            raise
+        finally:
+            self._leave(key, call)
+
+    def stream(self, key: Optional[Hashable], open_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """
+        Yield the text of open_stream() within a slot. Identical concurrent
+        streams wait for the first one and get its whole text at once.
+        """
+        call, leader = self._join(key)
+        if not leader:
+            yield call.wait(self.wait_timeout)
+            return
+        parts = []
+        try:
+            self.acquire()
+            with self._outcome():
+                for text in open_stream():
+                    parts.append(text)
+                    yield text
+            call.set_result("".join(parts))
+        except BaseException as e:
+            call.set_error(e)
+            raise
+        finally:
+            if not call.done:
+                # The consumer stopped reading before the end
+                call.set_error(AdmissionRejected("Identical call was abandoned"))
+            self._leave(key, call)
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide AdmissionController."""
+    global _controller
+    if _controller is None:
+        with _registry_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    max_concurrent=settings.AI_MAX_CONCURRENT_CALLS,
+                    queue_timeout=settings.AI_QUEUE_TIMEOUT,
+                    rate_per_minute=settings.AI_RATE_LIMIT_RPM,
+                    burst=settings.AI_RATE_LIMIT_BURST or None,
+                    shared=settings.AI_RATE_LIMIT_SHARED,
+                    wait_timeout=settings.AI_INFLIGHT_WAIT_TIMEOUT,
+                    breaker=CircuitBreaker(
+                        window=settings.AI_CIRCUIT_WINDOW,
+                        min_calls=settings.AI_CIRCUIT_MIN_CALLS,
+                        failure_rate=settings.AI_CIRCUIT_FAILURE_RATE,
+                        open_seconds=settings.AI_CIRCUIT_OPEN_SECONDS,
+                    ),
+                )
+    return _controller
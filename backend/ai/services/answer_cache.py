@@ -0,0 +1,207 @@
+"""
+Answer cache for repeated visitor questions.
+
+Visitors keep opening the chat with the same few questions. Answers to a
+conversation's first question are cached per language and resume content
+generation, keyed by the normalized question, with an optional
+near-duplicate match on token sets ("what's your experience" and "what is
+your experience?" share an answer).
+
+A cold bucket is seeded from AIChatLog: first questions of sessions logged
+since the resume content last changed. Entries expire after a TTL, and a
+content change starts a fresh bucket.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from resume import invalidation
+from ..models import AIChatLog
+from .gemini_service import GeminiService
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+# Filler words that do not change what a question is about
+_STOPWORDS = frozenset(
+    "a an the is are was were be do does did can could would will what s "
+    "whats which who how you your yours me my i to of in on for about tell".split()
+)
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+def question_tokens(normalized: str) -> frozenset:
+    """Content word tokens; scripts written without spaces use character bigrams."""
+    tokens = set()
+    for word in normalized.split():
+        if word in _STOPWORDS:
+            continue
+        if _CJK_RE.search(word) and len(word) > 1:
+            tokens.update(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.add(word)
+    return frozenset(tokens)
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Bucket:
+    """Answers for one language and content generation."""
+
+    def __init__(self, generation: str):
+        self.generation = generation
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+
+class AnswerCache:
+    """In-process answer cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        fallback_message: Callable[[str], str] = lambda language: "",
+        ttl: int = 86400,
+        max_entries: int = 500,
+        similarity: float = 0.8,
+        seed_limit: int = 500,
+        max_languages: int = 64,
+    ):
+        # Returns the "AI unavailable" text for a language, never cached
+        self.fallback_message = fallback_message
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 1.0 or more disables near-duplicate matching
+        self.similarity = similarity
+        self.seed_limit = seed_limit
+        # Buckets are kept in LRU order; callers resolve site languages,
+        # this only bounds memory should one pass something else
+        self.max_languages = max_languages
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _bucket(self, language: str) -> _Bucket:
+        generation = invalidation.get_generation(invalidation.AI_CONTEXT, language)
+        bucket = self._buckets.get(language)
+        if bucket is not None and bucket.generation == generation:
+            with self._lock:
+                if language in self._buckets:
+                    self._buckets.move_to_end(language)
+            return bucket
+
+        bucket = _Bucket(generation)
+        try:
+            self._seed(bucket, language, generation)
+        except Exception as e:
+            logger.warning(f"Answer cache seeding failed: {e}")
+        with self._lock:
+            self._buckets[language] = bucket
+            self._buckets.move_to_end(language)
+            while len(self._buckets) > self.max_languages:
+                self._buckets.popitem(last=False)
+        return bucket
+
+    def _seed(self, bucket: _Bucket, language: str, generation: str):
+        """Load first questions answered since the content generation began."""
+        since = datetime.fromtimestamp(invalidation.changed_at(generation), tz=dt_timezone.utc)
+        earlier = AIChatLog.objects.filter(
+            session_id=OuterRef('session_id'), timestamp__lt=OuterRef('timestamp')
+        )
+        rows = (
+            AIChatLog.objects.filter(language=language, timestamp__gte=since)
+            .exclude(Exists(earlier))
+            .exclude(ai_response=self.fallback_message(language))
+            .order_by('-timestamp')
+            .values_list('user_message', 'ai_response')[:self.seed_limit]
+        )
+        expires = time.monotonic() + self.ttl
+        for question, answer in reversed(rows):
+            normalized = normalize_question(question)
+            if normalized:
+                bucket.entries[normalized] = (answer, question_tokens(normalized), expires)
+        while len(bucket.entries) > self.max_entries:
+            bucket.entries.popitem(last=False)
+
+    def get(self, language: str, question: str) -> Optional[str]:
+        """Return a cached answer for a conversation's first question."""
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        bucket = self._bucket(language)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = bucket.entries.get(normalized)
+            if entry is not None:
+                if entry[2] > now:
+                    bucket.entries.move_to_end(normalized)
+                    self.stats["hits"] += 1
+                    return entry[0]
+                del bucket.entries[normalized]
+                self.stats["evictions"] += 1
+
+            if self.similarity < 1.0:
+                tokens = question_tokens(normalized)
+                best, best_score = None, self.similarity
+                for key, (answer, entry_tokens, expires) in bucket.entries.items():
+                    if expires > now:
+                        score = _similarity(tokens, entry_tokens)
+                        if score >= best_score:
+                            best, best_score = answer, score
+                if best is not None:
+                    self.stats["near_hits"] += 1
+                    return best
+
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, language: str, question: str, answer: str):
+        """Remember the model's answer to a conversation's first question."""
+        normalized = normalize_question(question)
+        if not normalized or not answer or answer == self.fallback_message(language):
+            return
+        bucket = self._bucket(language)
+        with self._lock:
+            bucket.entries[normalized] = (answer, question_tokens(normalized), time.monotonic() + self.ttl)
+            bucket.entries.move_to_end(normalized)
+            self.stats["stores"] += 1
+            while len(bucket.entries) > self.max_entries:
+                bucket.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Return the process-wide answer cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache(
+                    fallback_message=GeminiService._get_fallback_message,
+                    ttl=settings.AI_ANSWER_CACHE_TTL,
+                    similarity=settings.AI_ANSWER_CACHE_SIMILARITY,
+                )
+    return _cache
@@ -0,0 +1,106 @@
+"""
+Circuit breaker for the model client.
+
+While the API is failing, waiting for every call to time out only ties up
+workers. The breaker tracks the outcome of calls over the last
+AI_CIRCUIT_WINDOW seconds; once at least AI_CIRCUIT_MIN_CALLS calls were
+made and AI_CIRCUIT_FAILURE_RATE of them failed, it opens and calls fail
+immediately. After AI_CIRCUIT_OPEN_SECONDS it lets a single probe call
+through (half-open): success closes the circuit, failure opens it again.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """See the module docstring."""
+
+    def __init__(self, window: float = 60, min_calls: int = 5, failure_rate: float = 0.5,
+                 open_seconds: float = 30):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        # (time, failed) of recent calls
+        self._outcomes = deque()
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are being rejected; cheap, takes no lock."""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; in half-open, only one probe."""
+        if self.state == CLOSED:
+            return True
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._probing = False
+                logger.info("AI circuit half-open, probing the API")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def cancel(self):
+        """The allowed call was not made after all."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._reset()
+                logger.info("AI circuit closed")
+                return
+            self._record(failed=False)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._record(failed=True)
+            calls = len(self._outcomes)
+            if self.state == CLOSED and calls >= self.min_calls and self._failures / calls >= self.failure_rate:
+                self._open()
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _record(self, failed: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._failures -= self._outcomes.popleft()[1]
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+        logger.warning(f"AI circuit open, failing model calls fast for {self.open_seconds}s")
+
+    def _reset(self):
+        self.state = CLOSED
+        self._probing = False
+        self._outcomes.clear()
+        self._failures = 0
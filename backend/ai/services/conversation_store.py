@@ -0,0 +1,153 @@
+"""
+Server-side conversation history for the AI chat.
+
+Clients only send the new message with their session_id; the rolling
+conversation is kept here in an in-memory LRU with a TTL. Sessions that
+are not in memory (expired, evicted, or started before a restart) are
+reloaded from AIChatLog, and so are sessions that another worker process
+logged turns for since this process last saw them.
+
+History is bounded: only the most recent turns are sent to the model and
+older turns are folded into a short summary of the visitor's questions,
+so prompt size stays flat however long the conversation gets.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..models import AIChatLog
+
+
+class ConversationStore:
+    """Thread-safe LRU of recent conversations keyed by session_id."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: int = 3600,
+        max_turns: int = 6,
+        max_message_chars: int = 2000,
+        max_summary_chars: int = 1000,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.max_message_chars = max_message_chars
+        self.max_summary_chars = max_summary_chars
+        # session_id -> (expires, turns, summary, synced_at)
+        self._sessions: "OrderedDict[str, Tuple[float, List[Tuple[str, str]], str, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _truncate(self, text: str) -> str:
+        if len(text) <= self.max_message_chars:
+            return text
+        return text[:self.max_message_chars] + "..."
+
+    def _compact(self, turns: List[Tuple[str, str]], summary: str):
+        """Keep the last max_turns turns, folding older questions into the summary."""
+        if len(turns) <= self.max_turns:
+            return turns, summary
+        dropped, turns = turns[:-self.max_turns], turns[-self.max_turns:]
+        questions = [question.replace("\n", " ")[:200] for question, _ in dropped]
+        summary = "; ".join(filter(None, [summary] + questions))
+        if len(summary) > self.max_summary_chars:
+            summary = "..." + summary[-self.max_summary_chars:]
+        return turns, summary
+
+    def _load(self, session_id: str):
+        """Rebuild a conversation from the chat log."""
+        # Turns older than the window only contribute to the summary
+        rows = list(
+            AIChatLog.objects.filter(session_id=session_id)
+            .order_by('-timestamp')
+            .values_list('user_message', 'ai_response')[:self.max_turns * 4]
+        )
+        rows.reverse()
+        turns = [(self._truncate(question), self._truncate(answer)) for question, answer in rows]
+        return self._compact(turns, "")
+
+    def _get(self, session_id: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry and entry[0] > now:
+                self._sessions.move_to_end(session_id)
+                return entry[1:]
+            if entry:
+                del self._sessions[session_id]
+        return None
+
+    def _get_current(self, session_id: str):
+        """The cached conversation, unless another process logged turns since."""
+        cached = self._get(session_id)
+        if cached is None:
+            return None
+        turns, summary, synced_at = cached
+        if AIChatLog.objects.filter(session_id=session_id, timestamp__gt=synced_at).exists():
+            return None
+        return turns, summary
+
+    def _put(self, session_id: str, turns, summary: str):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, turns, summary, timezone.now())
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def get_history(self, session_id: Optional[str]) -> List[Dict]:
+        """Return the bounded conversation in Gemini chat history format."""
+        if not session_id:
+            return []
+        cached = self._get_current(session_id)
+        if cached is None:
+            cached = self._load(session_id)
+            self._put(session_id, *cached)
+        turns, summary = cached
+
+        history = []
+        if summary:
+            history.append({"role": "user", "parts": [f"Earlier in this conversation I asked about: {summary}"]})
+            history.append({"role": "model", "parts": ["Noted."]})
+        for question, answer in turns:
+            history.append({"role": "user", "parts": [question]})
+            history.append({"role": "model", "parts": [answer]})
+        return history
+
+    def append(self, session_id: str, message: str, response: str):
+        """Record a completed turn, after it was saved to AIChatLog."""
+        # Checked against the log by get_history() earlier in the request
+        cached = self._get(session_id)
+        if cached is None:
+            # The log already has this turn
+            self._put(session_id, *self._load(session_id))
+            return
+        turns, summary, _ = cached
+        turns = turns + [(self._truncate(message), self._truncate(response))]
+        self._put(session_id, *self._compact(turns, summary))
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide conversation store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationStore(
+                    max_sessions=settings.AI_CONVERSATION_MAX_SESSIONS,
+                    ttl=settings.AI_CONVERSATION_TTL,
+                    max_turns=settings.AI_CONVERSATION_MAX_TURNS,
+                )
+    return _store
@@ -0,0 +1,142 @@
+"""
+Local stand-in for the Gemini model, for benchmarks and load tests.
+
+FakeGenerativeModel has the parts of google.generativeai.GenerativeModel
+that GeminiService uses (start_chat, send_message with and without
+stream, send_message_async) and works without any network access. It
+simulates the API's behaviour as configured by FakeModelOptions:
+
+- latency before the first token, then streaming at a token rate; past
+  the request_options timeout, a 504 DeadlineExceeded
+- random server errors (503 ServiceUnavailable)
+- rate limiting (429 ResourceExhausted) past a number of requests per
+  minute, or at random
+
+The exceptions are the ones google.generativeai raises, so callers handle
+them exactly as they would real failures. With a seed, the same sequence
+of requests sees the same errors.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Iterator, List, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+
+DEFAULT_ANSWER = (
+    "John has over five years of experience building web applications with Python, Django, "
+    "React and Node.js, and currently leads a development team."
+)
+
+
+@dataclass(frozen=True)
+class FakeModelOptions:
+    # Delay before the first token
+    latency_ms: float = 0.0
+    # Streaming speed; 0 sends the rest of the answer at once
+    tokens_per_second: float = 0.0
+    # Probability that a request fails with a server error
+    error_rate: float = 0.0
+    # Probability that a request is rejected as rate limited
+    rate_limit_rate: float = 0.0
+    # Requests allowed per rolling minute, 0 for no limit
+    rate_limit_rpm: int = 0
+    # Words per streamed chunk
+    chunk_words: int = 5
+    seed: Optional[int] = None
+    answer: str = DEFAULT_ANSWER
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "FakeModelOptions":
+        """Options from a dict such as a JSON setting; unknown keys are ignored."""
+        names = {field.name for field in fields(cls)}
+        return cls(**{name: value for name, value in values.items() if name in names})
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeChat:
+    def __init__(self, model: "FakeGenerativeModel", history: Optional[List] = None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, message, stream: bool = False, request_options: Optional[dict] = None):
+        self.model.admit()
+        if stream:
+            return self._stream(request_options)
+        self._wait(request_options)
+        return FakeResponse(self.model.options.answer)
+
+    def _wait(self, request_options: Optional[dict]):
+        seconds, timed_out = self.model.delay(request_options)
+        time.sleep(seconds)
+        if timed_out:
+            raise api_exceptions.DeadlineExceeded("Simulated timeout")
+
+    def _stream(self, request_options: Optional[dict]) -> Iterator[FakeResponse]:
+        self._wait(request_options)
+        for chunk, delay in self.model.chunks():
+            time.sleep(delay)
+            yield FakeResponse(chunk)
+
+    async def send_message_async(self, message, request_options: Optional[dict] = None):
+        self.model.admit()
+        seconds, timed_out = self.model.delay(request_options)
+        await asyncio.sleep(seconds)
+        if timed_out:
+            raise api_exceptions.DeadlineExceeded("Simulated timeout")
+        return FakeResponse(self.model.options.answer)
+
+
+class FakeGenerativeModel:
+    """Simulated model; see the module docstring."""
+
+    def __init__(self, options: Optional[FakeModelOptions] = None):
+        self.options = options or FakeModelOptions()
+        self.latency = self.options.latency_ms / 1000
+        self._random = random.Random(self.options.seed)
+        self._lock = threading.Lock()
+        # Admission times within the last minute, for rate_limit_rpm
+        self._recent = deque()
+
+    def start_chat(self, history: Optional[List] = None) -> FakeChat:
+        return FakeChat(self, history)
+
+    def admit(self):
+        """Raise the error the API would return for this request, if any."""
+        options = self.options
+        with self._lock:
+            roll = self._random.random()
+            if options.rate_limit_rpm:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if len(self._recent) >= options.rate_limit_rpm:
+                    raise api_exceptions.ResourceExhausted("Simulated rate limit: requests per minute exceeded")
+                self._recent.append(now)
+        if roll < options.rate_limit_rate:
+            raise api_exceptions.ResourceExhausted("Simulated rate limit")
+        if roll < options.rate_limit_rate + options.error_rate:
+            raise api_exceptions.ServiceUnavailable("Simulated server error")
+
+    def delay(self, request_options: Optional[dict] = None) -> Tuple[float, bool]:
+        """Seconds until the answer or the request timeout, and whether it times out."""
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and self.latency > timeout:
+            return timeout, True
+        return self.latency, False
+
+    def chunks(self):
+        """(text, delay before it) of each streamed chunk."""
+        words = self.options.answer.split(" ")
+        size = max(self.options.chunk_words, 1)
+        for i in range(0, len(words), size):
+            chunk = words[i:i + size]
+            delay = len(chunk) / self.options.tokens_per_second if self.options.tokens_per_second > 0 else 0
+            yield " ".join(chunk) + (" " if i + size < len(words) else ""), delay
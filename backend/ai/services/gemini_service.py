@@ -1,25 +1,135 @@
 """
 Gemini API service for AI chat functionality.
-Uses gemini-2.0-flash-exp model (latest as of 2025).
+Uses gemini-2.0-flash-exp model (latest as of 2025), or the local fake
+model when the ai_provider setting selects it (see providers).
 """
-import google.generativeai as genai
+import logging
+import threading
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+
+from resume import invalidation
+from .admission import AdmissionRejected, get_admission_controller, question_key
+from .providers import ClientConfig, load_client_config
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_FALLBACK_MESSAGE = "AI assistant is currently unavailable. Please try again later."
+# Languages whose fallback message is kept; requests name arbitrary
+# languages, so the memo is emptied when it grows past this
+FALLBACK_MEMO_LANGUAGES = 64
+
+_registry_lock = threading.Lock()
+_config_memo = None
+_fallback_memo: Dict[str, Tuple[Tuple[str, str], str]] = {}
+_service = None
+
+
+def get_client_config() -> ClientConfig:
+    """
+    Return the model client configuration, re-reading it only after the
+    API key or provider settings have changed.
+    """
+    global _config_memo
+    generation = invalidation.get_generation(invalidation.AI_CLIENT, invalidation.ALL_LANGUAGES)
+    memo = _config_memo
+    if memo and memo[0] == generation:
+        return memo[1]
+
+    config = load_client_config()
+    _config_memo = (generation, config)
+    return config
+
+
+def get_api_key() -> str:
+    """Return the configured API key."""
+    return get_client_config().api_key
+
+
+def is_configured() -> bool:
+    """Whether chats can be served: an API key is set, or the provider needs none."""
+    return get_client_config().is_configured
+
+
+def get_gemini_service() -> 'GeminiService':
+    """
+    Return the process-wide GeminiService.
+
+    The client is built once and reused by every request, so the model and
+    its HTTP connections survive between chats. It is only rebuilt when the
+    API key or provider changes. Raises ValueError if no API key is configured.
+    """
+    global _service
+    config = get_client_config()
+    service = _service
+    if service is not None and service.config == config:
+        return service
+
+    with _registry_lock:
+        if _service is None or _service.config != config:
+            _service = GeminiService(config=config)
+            # Failures of the old client say nothing about the new one
+            breaker = get_admission_controller().breaker
+            if breaker is not None:
+                breaker.reset()
+            logger.info(f"AI client configured ({config.provider})")
+        return _service
+
+
+def get_fallback_message(language: str = 'en') -> str:
+    """
+    Message shown when the model cannot answer, in the given language or
+    English. Kept in memory and re-read only after translations change, so
+    failing fast costs no queries.
+    """
+    generation = (
+        invalidation.get_generation(invalidation.TRANSLATIONS, language),
+        invalidation.get_generation(invalidation.TRANSLATIONS, 'en'),
+    )
+    memo = _fallback_memo.get(language)
+    if memo and memo[0] == generation:
+        return memo[1]
+
+    try:
+        from resume.models import Translation
+        messages = dict(
+            Translation.objects.filter(key='aiUnavailable', language__in=[language, 'en'])
+            .values_list('language', 'value')
+        )
+    except Exception as e:
+        logger.warning(f"Error reading the AI fallback message: {e}")
+        return DEFAULT_FALLBACK_MESSAGE
+
+    message = messages.get(language) or messages.get('en') or DEFAULT_FALLBACK_MESSAGE
+    if len(_fallback_memo) >= FALLBACK_MEMO_LANGUAGES:
+        _fallback_memo.clear()
+    _fallback_memo[language] = (generation, message)
+    return message
 
 
 class GeminiService:
     """Handle Gemini API interactions for resume chatbot."""
     
-    def __init__(self):
-        """Initialize Gemini with API key from settings."""
-        api_key = self._get_api_key()
-        if not api_key:
+    def __init__(self, api_key: Optional[str] = None, config: Optional[ClientConfig] = None):
+        """
+        Initialize Gemini with API key from settings, or with the given
+        client configuration.
+        Prefer get_gemini_service(), which reuses one configured client.
+        """
+        if config is None:
+            config = ClientConfig(api_key=self._get_api_key() if api_key is None else api_key)
+        if not config.is_configured:
             raise ValueError("GEMINI_API_KEY not configured")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+
+        self.config = config
+        self.api_key = config.api_key
+        self.model = config.get_provider().create_model(config)
+        self.request_options = {"timeout": settings.AI_REQUEST_TIMEOUT}
     
-    def _get_api_key(self) -> str:
+    @staticmethod
+    def _get_api_key() -> str:
         """Get API key from settings table or environment."""
         try:
             from resume.models import Setting
@@ -30,27 +140,12 @@ class GeminiService:
             pass
         return settings.GEMINI_API_KEY if hasattr(settings, 'GEMINI_API_KEY') else ''
     
-    def chat(
+    def _build_history(
         self,
-        message: str,
         chat_history: Optional[List[Dict]] = None,
-        resume_context: Optional[str] = None,
-        language: str = 'en'
-    ) -> str:
-        """
-        Send message to Gemini API.
-
-        Args:
-            message: User's question
-            chat_history: Previous conversation in format:
-                [{"role": "user", "parts": "..."}, {"role": "model", "parts": "..."}]
-            resume_context: Resume data from database (include only on first message)
-            language: Language code for response
-
-        Returns:
-            AI response text
-        """
-        # Build conversation history
+        resume_context: Optional[str] = None
+    ) -> List[Dict]:
+        """Build conversation history with the system prompt and resume."""
         history = []
 
         # Add system prompt and resume on first message
@@ -74,35 +169,130 @@ class GeminiService:
                 "role": "model",
                 "parts": ["I understand. I'm ready to answer questions about this person's resume and experience."]
             })
-        
+
         # Add previous chat history
         if chat_history:
             history.extend(chat_history)
-        
+
+        return history
+
+    @staticmethod
+    def _with_constraint(message: str) -> str:
+        """Append the response length constraint to a user message."""
+        return f"{message}\n\nIMPORTANT: Keep your response to a maximum of 100 words. Be brief and concise."
+
+    @staticmethod
+    def _coalesce_key(message: str, chat_history: Optional[List[Dict]], language: str):
+        """
+        Key that lets identical concurrent questions share a call; only first
+        questions, as answers to follow-ups depend on the conversation.
+        """
+        return None if chat_history else question_key(language, message)
+
+    def chat(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict]] = None,
+        resume_context: Optional[str] = None,
+        language: str = 'en'
+    ) -> str:
+        """
+        Send message to Gemini API.
+
+        Args:
+            message: User's question
+            chat_history: Previous conversation in format:
+                [{"role": "user", "parts": "..."}, {"role": "model", "parts": "..."}]
+            resume_context: Resume data from database (include only on first message)
+            language: Language code for response
+
+        Returns:
+            AI response text
+        """
         # Start chat with history
-        chat = self.model.start_chat(history=history)
-        
+        chat = self.model.start_chat(history=self._build_history(chat_history, resume_context))
+
         # Send message with length constraint
         try:
-            message_with_constraint = f"{message}\n\nIMPORTANT: Keep your response to a maximum of 100 words. Be brief and concise."
-            response = chat.send_message(message_with_constraint)
-            return response.text
+            return get_admission_controller().call(
+                self._coalesce_key(message, chat_history, language),
+                lambda: chat.send_message(self._with_constraint(message), request_options=self.request_options).text,
+            )
         except Exception as e:
             # Return fallback message
             return self._get_fallback_message(language)
-    
-    def _get_fallback_message(self, language: str = 'en') -> str:
-        """Get fallback message when API fails."""
+
+    async def chat_async(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict]] = None,
+        resume_context: Optional[str] = None,
+        language: str = 'en'
+    ) -> str:
+        """
+        Send message to Gemini API without blocking the event loop.
+
+        Takes the same arguments as chat().
+        """
+        chat = self.model.start_chat(history=self._build_history(chat_history, resume_context))
+
+        async def send():
+            response = await chat.send_message_async(
+                self._with_constraint(message), request_options=self.request_options
+            )
+            return response.text
+
         try:
-            from resume.models import Translation
-            translation = Translation.objects.filter(key='aiUnavailable', language=language).first()
-            if translation:
-                return translation.value
-            # Fallback to English if translation not found
-            translation_en = Translation.objects.filter(key='aiUnavailable', language='en').first()
-            if translation_en:
-                return translation_en.value
-        except Exception:
-            pass
-        return "AI assistant is currently unavailable. Please try again later."
+            return await get_admission_controller().acall(
+                self._coalesce_key(message, chat_history, language), send
+            )
+        except AdmissionRejected:
+            return await sync_to_async(self._get_fallback_message)(language)
+        except Exception as e:
+            logger.warning(f"Gemini async error: {e}")
+            return await sync_to_async(self._get_fallback_message)(language)
+
+    def chat_stream(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict]] = None,
+        resume_context: Optional[str] = None,
+        language: str = 'en'
+    ) -> Iterator[str]:
+        """
+        Send message to Gemini API and yield response text as it is generated.
+
+        Takes the same arguments as chat(). If the API fails before anything
+        was produced, the fallback message is yielded instead.
+        """
+        chat = self.model.start_chat(history=self._build_history(chat_history, resume_context))
+
+        def open_stream():
+            stream = chat.send_message(
+                self._with_constraint(message), stream=True, request_options=self.request_options
+            )
+            for chunk in stream:
+                text = chunk.text
+                if text:
+                    yield text
+
+        produced = False
+        try:
+            for text in get_admission_controller().stream(
+                self._coalesce_key(message, chat_history, language), open_stream
+            ):
+                produced = True
+                yield text
+        except AdmissionRejected:
+            if not produced:
+                yield self._get_fallback_message(language)
+        except Exception as e:
+            logger.warning(f"Gemini streaming error: {e}")
+            if not produced:
+                yield self._get_fallback_message(language)
+
+    @staticmethod
+    def _get_fallback_message(language: str = 'en') -> str:
+        """Get fallback message when API fails."""
+        return get_fallback_message(language)
 
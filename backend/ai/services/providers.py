@@ -0,0 +1,99 @@
+"""
+Model providers for GeminiService.
+
+"gemini" talks to the Gemini API through google.generativeai; "fake" is
+the local stand-in from fake_model, for load and latency tests without a
+network. The provider is chosen by the ai_provider setting, or the
+AI_PROVIDER environment variable when that is empty. Fake model options
+come from the AI_FAKE_* environment variables, overridden by the JSON
+object in the ai_fake_options setting.
+"""
+import json
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import google.generativeai as genai
+from django.conf import settings
+
+from .fake_model import FakeGenerativeModel, FakeModelOptions
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'gemini-2.0-flash-exp'
+
+# Setting rows that configure the model client
+CLIENT_SETTINGS = ['gemini_api_key', 'ai_provider', 'ai_fake_options']
+
+
+class GeminiProvider:
+    name = "gemini"
+    requires_api_key = True
+
+    def create_model(self, config: "ClientConfig"):
+        genai.configure(api_key=config.api_key)
+        return genai.GenerativeModel(MODEL_NAME)
+
+
+class FakeProvider:
+    name = "fake"
+    requires_api_key = False
+
+    def create_model(self, config: "ClientConfig"):
+        return FakeGenerativeModel(config.fake_options)
+
+
+PROVIDERS = {provider.name: provider for provider in [GeminiProvider(), FakeProvider()]}
+
+
+@dataclass(frozen=True)
+class ClientConfig:
+    """Everything the model client is built from; a change means a rebuild."""
+    api_key: str
+    provider: str = GeminiProvider.name
+    fake_options: Optional[FakeModelOptions] = None
+
+    def get_provider(self):
+        return PROVIDERS[self.provider]
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key) or not self.get_provider().requires_api_key
+
+
+def default_fake_options() -> dict:
+    return {
+        'latency_ms': settings.AI_FAKE_LATENCY_MS,
+        'tokens_per_second': settings.AI_FAKE_TOKENS_PER_SECOND,
+        'error_rate': settings.AI_FAKE_ERROR_RATE,
+        'rate_limit_rate': settings.AI_FAKE_RATE_LIMIT_RATE,
+        'rate_limit_rpm': settings.AI_FAKE_RATE_LIMIT_RPM,
+        'seed': settings.AI_FAKE_SEED,
+    }
+
+
+def load_client_config() -> ClientConfig:
+    """Read the client configuration from settings rows and the environment."""
+    values = {}
+    try:
+        from resume.models import Setting
+        values = dict(Setting.objects.filter(name__in=CLIENT_SETTINGS).values_list('name', 'value'))
+    except Exception as e:
+        logger.warning(f"Error reading AI client settings: {e}")
+
+    api_key = values.get('gemini_api_key') or getattr(settings, 'GEMINI_API_KEY', '')
+    provider = (values.get('ai_provider') or settings.AI_PROVIDER or GeminiProvider.name).strip().lower()
+    if provider not in PROVIDERS:
+        logger.warning(f"Unknown AI provider '{provider}', using {GeminiProvider.name}")
+        provider = GeminiProvider.name
+
+    fake_options = None
+    if provider == FakeProvider.name:
+        options = default_fake_options()
+        try:
+            options.update(json.loads(values.get('ai_fake_options') or '{}'))
+        except (json.JSONDecodeError, TypeError, ValueError):
+            logger.warning("Invalid ai_fake_options setting, using the defaults")
+        fake_options = FakeModelOptions.from_dict(options)
+
+    return ClientConfig(api_key=api_key, provider=provider, fake_options=fake_options)
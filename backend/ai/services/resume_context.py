@@ -0,0 +1,85 @@
+"""
+Resume context for the AI assistant.
+
+The context is a markdown rendering of all resume content for a language,
+made of the same chunks retrieval picks from.
+It only changes when an admin edits content, so it is memoized per process
+and shared through the cache under the ai_context generation token.
+"""
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from resume import invalidation
+
+logger = logging.getLogger(__name__)
+
+# Languages whose context is memoized; callers resolve site languages,
+# this only bounds the memo should one pass something else
+MEMO_LANGUAGES = 64
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def build_resume_context(language: str) -> str:
+    """
+    Build resume context from database for AI.
+    Returns formatted string with all resume data.
+    """
+    from rag.services.chunks import build_chunks, render_chunks
+
+    return render_chunks(build_chunks(language))
+
+
+def get_resume_context(language: str) -> str:
+    """
+    Return resume context for a language, rebuilding it only after
+    resume content for that language has changed.
+    """
+    generation = invalidation.get_generation(invalidation.AI_CONTEXT, language)
+    memoized = _memo.get(language)
+    if memoized and memoized[0] == generation:
+        return memoized[1]
+
+    cache = invalidation.get_cache()
+    key = f"ai:resume_context:{language}"
+    context = cache.get(key, version=generation)
+    if context is None:
+        from rag.services.chunks import render_chunks
+        from rag.services.retrieval import get_chunks
+
+        # Rendered from the retriever's chunks, so the rows are read once
+        context = render_chunks(get_chunks(language, generation))
+        cache.set(key, context, timeout=settings.SNAPSHOT_CACHE_TIMEOUT, version=generation)
+
+    with _memo_lock:
+        if len(_memo) >= MEMO_LANGUAGES and language not in _memo:
+            _memo.clear()
+        _memo[language] = (generation, context)
+    return context
+
+
+def warm_up():
+    """Build the context and retrieval index for every site language."""
+    from rag.services.retrieval import get_retriever
+    from resume.languages import get_site_language_codes
+
+    try:
+        for language in get_site_language_codes():
+            get_resume_context(language)
+            get_retriever(language)
+        logger.info("AI resume context warmed up")
+    except Exception as e:
+        logger.warning(f"AI resume context warm-up failed: {e}")
+    finally:
+        connections.close_all()
+
+
+def start_warm_up():
+    """Warm up in the background so server startup is not delayed."""
+    if not settings.AI_CONTEXT_WARMUP:
+        return
+    threading.Thread(target=warm_up, name="ai-context-warmup", daemon=True).start()
@@ -1,3 +1,301 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from rag.services import retrieval
+from resume.invalidation import get_cache
+from resume.models import CacheInvalidation, Setting, Translation
+
+from .models import AIChatLog
+from .services import gemini_service, resume_context
+from .services.admission import AdmissionController, AdmissionRejected, CircuitOpen
+from .services.answer_cache import AnswerCache
+from .services.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from .services.conversation_store import ConversationStore
+from .services.fake_model import DEFAULT_ANSWER
+
+
+class FakeProviderTests(TestCase):
+    """The fake provider serves chats offline, with simulated failures."""
+
+    def setUp(self):
+        get_cache().clear()
+        # A fresh fake model, without the previous test's rate limit window
+        gemini_service._service = None
+        Setting.objects.create(name='ai_provider', value='fake')
+        Setting.objects.create(name='ai_fake_options', value=json.dumps({
+            'latency_ms': 0, 'tokens_per_second': 0, 'rate_limit_rpm': 1,
+        }))
+
+    def chat(self, message):
+        return self.client.post('/api/ai/chat/', {'message': message}, content_type='application/json')
+
+    def test_answers_without_api_key(self):
+        response = self.chat('What is your experience with Python?')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['response'], DEFAULT_ANSWER)
+
+    def test_stream_accepts_event_stream(self):
+        response = self.client.post(
+            '/api/ai/chat/stream/', {'message': 'What is your experience with Python?'},
+            content_type='application/json', HTTP_ACCEPT='text/event-stream',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode().strip().split('\n\n')
+        deltas = [json.loads(event[len('data: '):])['delta'] for event in events[:-1]]
+        self.assertEqual(''.join(deltas), DEFAULT_ANSWER)
+        self.assertTrue(events[-1].startswith('event: done\ndata: {"session_id": '))
+
+    def test_unknown_languages_resolve_to_site_language(self):
+        resume_context._memo.clear()
+        retrieval._retrievers.clear()
+        for top_k in [0, 3]:
+            with override_settings(RAG_TOP_K=top_k):
+                for i in range(5):
+                    self.client.post('/api/ai/chat/', {'message': 'Hi', 'language': f'made-up-{i}'},
+                                     content_type='application/json')
+        self.assertEqual(set(resume_context._memo), {'en'})
+        self.assertEqual(set(retrieval._retrievers), {'en'})
+        self.assertEqual(set(AIChatLog.objects.values_list('language', flat=True)), {'en'})
+
+    async def test_async_view_answers_and_logs(self):
+        response = await self.async_client.post(
+            '/api/ai/chat/async/', {'message': 'What is your experience with Python?', 'session_id': 's1'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'response': DEFAULT_ANSWER, 'session_id': 's1'})
+        log = await AIChatLog.objects.aget(session_id='s1')
+        self.assertEqual((log.user_message, log.ai_response, log.language),
+                         ('What is your experience with Python?', DEFAULT_ANSWER, 'en'))
+
+    async def test_async_view_rejections(self):
+        for message in ['What is your experience with Python?', 'Which databases have you used?']:
+            response = await self.async_client.post('/api/ai/chat/async/', {'message': message},
+                                                    content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        # Over the rate limit, the visitor gets the fallback, which is logged too
+        self.assertNotEqual(response.json()['response'], DEFAULT_ANSWER)
+        self.assertEqual(await AIChatLog.objects.acount(), 2)
+
+        for body, status_code in [('{}', 400), ('not json', 400), ('[1]', 400)]:
+            with self.subTest(body=body):
+                response = await self.async_client.post('/api/ai/chat/async/', body,
+                                                        content_type='application/json')
+                self.assertEqual(response.status_code, status_code)
+        response = await self.async_client.get('/api/ai/chat/async/')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(await AIChatLog.objects.acount(), 2)
+
+    def test_chat_logs_invalidate_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.chat('What is your experience with Python?')
+        self.assertEqual(AIChatLog.objects.count(), 1)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(CacheInvalidation.objects.exists())
+
+    def test_rate_limited_requests_get_fallback(self):
+        self.chat('What is your experience with Python?')
+        response = self.chat('Which databases have you used?')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['response'], DEFAULT_ANSWER)
+
+
+class ConversationStoreTests(TestCase):
+    """Conversations are bounded, kept in memory and reloaded from the chat log."""
+
+    def log(self, store, session_id, question, answer):
+        AIChatLog.objects.create(session_id=session_id, user_message=question, ai_response=answer)
+        store.append(session_id, question, answer)
+
+    def questions(self, history):
+        return [message['parts'][0] for message in history if message['role'] == 'user']
+
+    def test_older_turns_are_folded_into_summary(self):
+        store = ConversationStore(max_turns=2, max_summary_chars=20)
+        self.assertEqual(store.get_history('s'), [])
+        for i in range(1, 6):
+            self.log(store, 's', f'Question {i}', f'Answer {i}')
+        history = store.get_history('s')
+        self.assertEqual(history[:2], [
+            {'role': 'user', 'parts': ['Earlier in this conversation I asked about: ...estion 2; Question 3']},
+            {'role': 'model', 'parts': ['Noted.']},
+        ])
+        self.assertEqual(history[2:], [
+            {'role': 'user', 'parts': ['Question 4']}, {'role': 'model', 'parts': ['Answer 4']},
+            {'role': 'user', 'parts': ['Question 5']}, {'role': 'model', 'parts': ['Answer 5']},
+        ])
+
+    def test_long_messages_are_truncated(self):
+        store = ConversationStore(max_message_chars=5)
+        store.get_history('s')
+        self.log(store, 's', 'Question', 'Answer')
+        self.assertEqual(self.questions(store.get_history('s')), ['Quest...'])
+
+    def test_sessions_are_reloaded_from_chat_log(self):
+        writer = ConversationStore(max_turns=2)
+        writer.get_history('s')
+        for i in range(1, 4):
+            self.log(writer, 's', f'Question {i}', f'Answer {i}')
+        # A restarted process compacts the log the same way
+        reader = ConversationStore(max_turns=2)
+        self.assertEqual(reader.get_history('s'), writer.get_history('s'))
+
+    def test_expired_and_evicted_sessions_are_reloaded(self):
+        store = ConversationStore(ttl=0)
+        store.get_history('s')
+        # Not logged, so only the in-memory entry has it
+        store.append('s', 'Question', 'Answer')
+        self.assertEqual(store.get_history('s'), [])
+
+        store = ConversationStore(max_sessions=2)
+        for session_id in ['a', 'b', 'a', 'c']:
+            store.get_history(session_id)
+        self.assertEqual(list(store._sessions), ['a', 'c'])
+
+    def test_turns_logged_by_another_process_are_reloaded(self):
+        store = ConversationStore()
+        store.get_history('s')
+        self.log(store, 's', 'Question 1', 'Answer 1')
+        # Nothing new in the log: one query to check, none to load
+        with self.assertNumQueries(1):
+            self.assertEqual(self.questions(store.get_history('s')), ['Question 1'])
+
+        other = ConversationStore()
+        self.log(other, 's', 'Question 2', 'Answer 2')
+        self.assertEqual(self.questions(store.get_history('s')), ['Question 1', 'Question 2'])
+
+
+class AnswerCacheTests(TestCase):
+    """Cached answers are kept per language, for a bounded number of languages."""
+
+    def test_buckets_are_bounded(self):
+        cache = AnswerCache(max_languages=2)
+        for language in ['en', 'ru', 'en', 'zh']:
+            cache.get(language, 'What is your experience?')
+        self.assertEqual(list(cache._buckets), ['en', 'zh'])
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    """Model calls are bounded, rate limited and coalesced."""
+
+    def test_identical_concurrent_calls_share_one_upstream_call(self):
+        controller = AdmissionController(max_concurrent=4, queue_timeout=1)
+        upstream_calls = []
+
+        def send():
+            upstream_calls.append(1)
+            time.sleep(0.2)
+            return 'answer'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(controller.call(('en', 'hi'), send)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['answer'] * 5)
+        self.assertEqual(len(upstream_calls), 1)
+
+    def test_async_callers_wait_without_threads(self):
+        controller = AdmissionController(max_concurrent=2, queue_timeout=5)
+        upstream_calls = []
+
+        async def send():
+            upstream_calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'answer'
+
+        async def burst():
+            threads = threading.active_count()
+            # Far more waiters than the default executor has threads
+            calls = [controller.acall(('en', 'hi'), send) for _ in range(100)]
+            calls += [controller.acall(None, send) for _ in range(10)]
+            results = await asyncio.gather(*calls)
+            return results, threading.active_count() - threads
+
+        results, new_threads = asyncio.run(burst())
+        self.assertEqual(results, ['answer'] * 110)
+        self.assertEqual(len(upstream_calls), 11)
+        self.assertEqual(new_threads, 0)
+
+    def test_async_rejects_calls_past_queue_timeout(self):
+        controller = AdmissionController(max_concurrent=1, queue_timeout=0.05)
+
+        async def run():
+            with controller.slot():
+                await controller.acall(None, lambda: asyncio.sleep(0))
+
+        with self.assertRaises(AdmissionRejected):
+            asyncio.run(run())
+
+    def test_slot_released_by_thread_goes_to_async_waiter(self):
+        controller = AdmissionController(max_concurrent=1, queue_timeout=5)
+        controller.acquire()
+        threading.Timer(0.05, controller.release).start()
+
+        async def answer():
+            return 'answer'
+
+        self.assertEqual(asyncio.run(controller.acall(None, answer)), 'answer')
+
+    def test_rejects_calls_past_queue_timeout(self):
+        controller = AdmissionController(max_concurrent=1, queue_timeout=0.05)
+        with controller.slot():
+            with self.assertRaises(AdmissionRejected):
+                controller.call(None, lambda: 'answer')
+
+    def test_rate_limit_spends_burst_then_rejects(self):
+        controller = AdmissionController(max_concurrent=4, queue_timeout=0.05, rate_per_minute=2)
+        self.assertEqual(controller.call(None, lambda: 1), 1)
+        self.assertEqual(controller.call(None, lambda: 2), 2)
+        with self.assertRaises(AdmissionRejected):
+            controller.call(None, lambda: 3)
+
+
+class CircuitBreakerTests(TestCase):
+    """An outage fails fast with the in-memory fallback message."""
+
+    def setUp(self):
+        get_cache().clear()
+        gemini_service._service = None
+        gemini_service._fallback_memo.clear()
+        Translation.objects.create(key='aiUnavailable', language='en', value='Unavailable')
+        self.breaker = CircuitBreaker(window=60, min_calls=2, failure_rate=0.5, open_seconds=60)
+        self.controller = AdmissionController(max_concurrent=4, queue_timeout=1, breaker=self.breaker)
+
+    def failing_call(self):
+        def send():
+            raise RuntimeError("upstream down")
+        with self.assertRaises(RuntimeError):
+            self.controller.call(None, send)
+
+    def test_opens_after_failures_and_fails_fast(self):
+        self.failing_call()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.failing_call()
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpen):
+            self.controller.call(None, lambda: 'answer')
+
+    def test_half_open_probe_closes_on_success(self):
+        self.failing_call()
+        self.failing_call()
+        self.breaker.open_seconds = 0
+        self.assertEqual(self.controller.call(None, lambda: 'answer'), 'answer')
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_fallback_message_is_memoized_until_translations_change(self):
+        self.assertEqual(gemini_service.get_fallback_message('ru'), 'Unavailable')
+        with self.assertNumQueries(0):
+            self.assertEqual(gemini_service.get_fallback_message('ru'), 'Unavailable')
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.create(key='aiUnavailable', language='ru', value='Недоступен')
+        self.assertEqual(gemini_service.get_fallback_message('ru'), 'Недоступен')
@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path("chat/", views.ai_chat, name="ai-chat"),
+    path("chat/stream/", views.ai_chat_stream, name="ai-chat-stream"),
+    path("chat/async/", views.ai_chat_async, name="ai-chat-async"),
 ]
 
@@ -2,97 +2,112 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from .services.gemini_service import GeminiService
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rag.services.retrieval import get_prompt_context
+from resume.languages import resolve_language
+from .services.gemini_service import get_gemini_service, is_configured
+from .services.conversation_store import get_conversation_store
+from .services.answer_cache import get_answer_cache
 from .models import AIChatLog
 import uuid
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def get_resume_context(language: str) -> str:
+def check_api_key():
+    """Return an error response if the Gemini API key is not configured."""
+    try:
+        if not is_configured():
+            return Response(
+                {'error': 'No API key'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+    except Exception as e:
+        logger.warning(f"Error checking API key: {e}")
+        return Response(
+            {'error': 'No API key'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return None
+
+
+def service_unavailable_response(error):
+    """Map a GeminiService configuration error to a 503 response."""
+    error_msg = str(error)
+    if "GEMINI_API_KEY not configured" in error_msg or "not configured" in error_msg.lower():
+        return Response(
+            {'error': 'No API key'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return Response(
+        {'error': error_msg},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
+
+def resolve_chat_language(language):
     """
-    Build resume context from database for AI.
-    Returns formatted string with all resume data.
+    Site language for a chat. Resolved before anything kept per language
+    (resume context, retriever, answer cache) is touched, so made-up
+    languages cannot grow them.
     """
-    from resume.models import (
-        Resume, Experience, Education, Skill,
-        Certificate, Project, Language as LangModel, ContactInfo
-    )
+    try:
+        return resolve_language(language)[0]
+    except Exception as e:
+        logger.warning(f"Error resolving chat language: {e}")
+        return 'en'
+
+
+def get_chat_history(session_id, chat_history=None):
+    """
+    Conversation so far for a session. The server-side store is
+    authoritative; a client-supplied chat_history is only used for
+    sessions the server has no record of.
+    """
+    history = get_conversation_store().get_history(session_id)
+    return history or chat_history or []
+
+
+def get_cached_answer(language, message, history):
+    """
+    Cached answer for the first question of a conversation. Later answers
+    depend on the conversation so far and always go to the model.
+    """
+    if history:
+        return None
+    try:
+        return get_answer_cache().get(language, message)
+    except Exception as e:
+        logger.warning(f"Error reading answer cache: {e}")
+        return None
+
 
-    parts = []
-
-    # Basic info
-    resume = Resume.objects.filter(language=language).first()
-    if resume:
-        parts.append(f"# {resume.firstname} {resume.lastname}")
-        parts.append(f"**{resume.resume_title}**")
-        parts.append(f"\n{resume.resume_description}")
-        parts.append(f"\n## About\n{resume.about_me}")
-
-    # Experience
-    experiences = Experience.objects.filter(language=language).order_by('order')
-    if experiences:
-        parts.append("\n## Experience")
-        for exp in experiences:
-            parts.append(f"\n### {exp.position} at {exp.company}")
-            parts.append(f"{exp.start_date} - {exp.end_date}")
-            parts.append(exp.description)
-
-    # Skills
-    skills = Skill.objects.filter(language=language).order_by('category_name_key', 'order')
-    if skills:
-        parts.append("\n## Skills")
-        current_category = None
-        for skill in skills:
-            if skill.category_name != current_category:
-                current_category = skill.category_name
-                parts.append(f"\n**{current_category}:**")
-            parts.append(f"- {skill.name}")
-
-    # Education
-    education = Education.objects.filter(language=language).order_by('order')
-    if education:
-        parts.append("\n## Education")
-        for edu in education:
-            location = f", {edu.location}" if edu.location else ""
-            faculty = f" - {edu.faculty}" if edu.faculty else ""
-            parts.append(f"- {edu.degree}{faculty} at {edu.institution}{location} ({edu.year})")
-
-    # Certificates
-    certificates = Certificate.objects.filter(language=language).order_by('order')
-    if certificates:
-        parts.append("\n## Certificates")
-        for cert in certificates:
-            year = f" ({cert.year})" if cert.year else ""
-            parts.append(f"- {cert.name}{year}")
-
-    # Projects
-    projects = Project.objects.filter(language=language).order_by('order')
-    if projects:
-        parts.append("\n## Projects")
-        for proj in projects:
-            techs = ", ".join(proj.technologies) if proj.technologies else ""
-            parts.append(f"\n### {proj.title}")
-            parts.append(proj.description)
-            if techs:
-                parts.append(f"Technologies: {techs}")
-
-    # Languages
-    languages = LangModel.objects.filter(language=language).order_by('order')
-    if languages:
-        parts.append("\n## Languages")
-        for lang in languages:
-            parts.append(f"- {lang.name}: {lang.level}")
-
-    # Contact
-    contacts = ContactInfo.objects.filter(language=language).order_by('order')
-    if contacts:
-        parts.append("\n## Contact")
-        for contact in contacts:
-            parts.append(f"- {contact.label}: {contact.value}")
-
-    return "\n".join(parts)
+def cache_answer(language, message, ai_response, history):
+    """Remember the model's answer to the first question of a conversation."""
+    if history:
+        return
+    try:
+        get_answer_cache().set(language, message, ai_response)
+    except Exception as e:
+        logger.warning(f"Error updating answer cache: {e}")
+
+
+def save_chat_log(session_id, message, ai_response, language):
+    """Persist a chat interaction, never failing the request."""
+    try:
+        AIChatLog.objects.create(
+            session_id=session_id,
+            user_message=message,
+            ai_response=ai_response,
+            language=language
+        )
+    except Exception as e:
+        logger.warning(f"Error saving chat log: {e}")
 
 
 @api_view(['POST'])
@@ -104,18 +119,18 @@ def ai_chat(request):
     Request body:
     {
         "message": "What is your experience?",
-        "chat_history": [  # Optional, empty on first message
+        "chat_history": [  # Optional, ignored once the server has history for session_id
             {"role": "user", "parts": ["Previous question"]},
             {"role": "model", "parts": ["Previous answer"]}
         ],
-        "session_id": "uuid",  # Optional, for tracking conversation
+        "session_id": "uuid",  # Optional, identifies the server-side conversation
         "language": "en"  # Optional, defaults to "en"
     }
     """
     message = request.data.get('message')
     chat_history = request.data.get('chat_history', [])
     session_id = request.data.get('session_id')
-    language = request.data.get('language', 'en')
+    language = resolve_chat_language(request.data.get('language', 'en'))
 
     if not message:
         return Response(
@@ -127,42 +142,26 @@ def ai_chat(request):
         session_id = str(uuid.uuid4())
 
     # Check if API key is configured
-    try:
-        from resume.models import Setting
-        api_key_setting = Setting.objects.filter(name='gemini_api_key').first()
-        if not api_key_setting or not api_key_setting.value:
-            return Response(
-                {'error': 'No API key'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-    except Exception as e:
-        logger.warning(f"Error checking API key: {e}")
-        return Response(
-            {'error': 'No API key'},
-            status=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
+    error_response = check_api_key()
+    if error_response:
+        return error_response
 
-    # Get resume context from DB (always include for context)
+    # Resume sections relevant to the question (always include for context)
     resume_context = None
     try:
-        resume_context = get_resume_context(language)
+        resume_context = get_prompt_context(language, message)
     except Exception as e:
         logger.warning(f"Error fetching resume data: {e}")
 
     try:
-        gemini = GeminiService()
-        ai_response = gemini.chat(message, chat_history, resume_context, language)
+        gemini = get_gemini_service()
+        history = get_chat_history(session_id, chat_history)
+        ai_response = get_cached_answer(language, message, history)
+        if ai_response is None:
+            ai_response = gemini.chat(message, history, resume_context, language)
+            cache_answer(language, message, ai_response, history)
     except ValueError as e:
-        error_msg = str(e)
-        if "GEMINI_API_KEY not configured" in error_msg or "not configured" in error_msg.lower():
-            return Response(
-                {'error': 'No API key'},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
-        return Response(
-            {'error': str(e)},
-            status=status.HTTP_503_SERVICE_UNAVAILABLE
-        )
+        return service_unavailable_response(e)
     except Exception as e:
         logger.error(f"AI service error: {e}")
         return Response(
@@ -170,9 +169,186 @@ def ai_chat(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
-    # Log chat interaction
+    # Log chat interaction and remember the turn
+    save_chat_log(session_id, message, ai_response, language)
+    get_conversation_store().append(session_id, message, ai_response)
+
+    return Response({
+        'response': ai_response,
+        'session_id': session_id
+    })
+
+
+def _json_response(data, status_code=200):
+    return JsonResponse(
+        data, status=status_code,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def parse_json_body(request):
+    """(data, None) for a JSON object body, or (None, error response)."""
     try:
-        AIChatLog.objects.create(
+        data = json.loads(request.body or b'{}')
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, _json_response({'error': 'Invalid JSON'}, status.HTTP_400_BAD_REQUEST)
+    if not isinstance(data, dict):
+        return None, _json_response({'error': 'Invalid JSON'}, status.HTTP_400_BAD_REQUEST)
+    return data, None
+
+
+def sse_event(data, event=None):
+    """Encode one server-sent event with a JSON payload."""
+    payload = json.dumps(data, ensure_ascii=False)
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {payload}\n\n"
+
+
+# A plain view: DRF's content negotiation only knows JSON and would answer
+# "Accept: text/event-stream" with 406. Open to anonymous visitors like the
+# DRF views, without session cookies, so exempt from CSRF checks.
+@csrf_exempt
+@require_POST
+def ai_chat_stream(request):
+    """
+    Streaming AI Chat endpoint using server-sent events.
+
+    Takes the same request body as ai_chat. The response is a stream of
+    events, each carrying a piece of the answer as it is generated:
+
+        data: {"delta": "..."}
+
+    followed by a final event once the answer is complete:
+
+        event: done
+        data: {"session_id": "uuid"}
+
+    The complete answer is saved to AIChatLog when the stream finishes.
+    """
+    data, error_response = parse_json_body(request)
+    if error_response:
+        return error_response
+
+    message = data.get('message')
+    chat_history = data.get('chat_history', [])
+    session_id = data.get('session_id')
+
+    if not message:
+        return _json_response({'error': 'Message is required'}, status.HTTP_400_BAD_REQUEST)
+
+    language = resolve_chat_language(data.get('language', 'en'))
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    error_response = check_api_key()
+    if error_response:
+        return _json_response(error_response.data, error_response.status_code)
+
+    resume_context = None
+    try:
+        resume_context = get_prompt_context(language, message)
+    except Exception as e:
+        logger.warning(f"Error fetching resume data: {e}")
+
+    try:
+        gemini = get_gemini_service()
+    except ValueError as e:
+        response = service_unavailable_response(e)
+        return _json_response(response.data, response.status_code)
+    except Exception as e:
+        logger.error(f"AI service error: {e}")
+        return _json_response({'error': 'AI service error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    history = get_chat_history(session_id, chat_history)
+    cached_answer = get_cached_answer(language, message, history)
+
+    def event_stream():
+        chunks = []
+        completed = False
+        try:
+            if cached_answer is not None:
+                chunks.append(cached_answer)
+                yield sse_event({'delta': cached_answer})
+            else:
+                for chunk in gemini.chat_stream(message, history, resume_context, language):
+                    chunks.append(chunk)
+                    yield sse_event({'delta': chunk})
+            completed = True
+            yield sse_event({'session_id': session_id}, event='done')
+        finally:
+            # Runs on completion and when the client disconnects mid-stream
+            if chunks:
+                ai_response = ''.join(chunks)
+                # Only complete answers are worth reusing
+                if completed and cached_answer is None:
+                    cache_answer(language, message, ai_response, history)
+                save_chat_log(session_id, message, ai_response, language)
+                get_conversation_store().append(session_id, message, ai_response)
+
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Like the DRF views, this endpoint is open to anonymous visitors and does
+# not rely on session cookies, so it is exempt from CSRF checks.
+@csrf_exempt
+@require_POST
+async def ai_chat_async(request):
+    """
+    Async AI Chat endpoint for ASGI deployments.
+
+    Takes the same request body and returns the same response as ai_chat,
+    but waits on the Gemini API and the database without holding a worker
+    thread, so one process can serve many slow conversations at once.
+    """
+    data, error_response = parse_json_body(request)
+    if error_response:
+        return error_response
+
+    message = data.get('message')
+    chat_history = data.get('chat_history', [])
+    session_id = data.get('session_id')
+    if not message:
+        return _json_response({'error': 'Message is required'}, status.HTTP_400_BAD_REQUEST)
+
+    language = await sync_to_async(resolve_chat_language)(data.get('language', 'en'))
+
+    if not session_id:
+        session_id = str(uuid.uuid4())
+
+    try:
+        configured = await sync_to_async(is_configured)()
+    except Exception as e:
+        logger.warning(f"Error checking API key: {e}")
+        configured = False
+    if not configured:
+        return _json_response({'error': 'No API key'}, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    resume_context = None
+    try:
+        resume_context = await sync_to_async(get_prompt_context)(language, message)
+    except Exception as e:
+        logger.warning(f"Error fetching resume data: {e}")
+
+    try:
+        gemini = await sync_to_async(get_gemini_service)()
+        history = await sync_to_async(get_chat_history)(session_id, chat_history)
+        ai_response = await sync_to_async(get_cached_answer)(language, message, history)
+        if ai_response is None:
+            ai_response = await gemini.chat_async(message, history, resume_context, language)
+            await sync_to_async(cache_answer)(language, message, ai_response, history)
+    except ValueError as e:
+        response = service_unavailable_response(e)
+        return _json_response(response.data, response.status_code)
+    except Exception as e:
+        logger.error(f"AI service error: {e}")
+        return _json_response({'error': 'AI service error'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    try:
+        await AIChatLog.objects.acreate(
             session_id=session_id,
             user_message=message,
             ai_response=ai_response,
@@ -180,8 +356,9 @@ def ai_chat(request):
         )
     except Exception as e:
         logger.warning(f"Error saving chat log: {e}")
+    await sync_to_async(get_conversation_store().append)(session_id, message, ai_response)
 
-    return Response({
+    return _json_response({
         'response': ai_response,
         'session_id': session_id
     })
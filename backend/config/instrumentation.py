@@ -0,0 +1,291 @@
+"""
+Per-view request metrics in Prometheus format.
+
+InstrumentationMiddleware records wall time, database time, query count
+and response size of every request into fixed-bucket histograms labelled
+by view and method. Observations go to per-thread shards, so recording
+takes no lock; shards are only merged when /metrics is scraped. When a
+thread ends (runserver starts one per request) its shard is folded into
+a shared total, so memory is bounded by the number of live threads and
+views, as labels come from the URLconf.
+
+Database metrics use a connection execute wrapper and only cover sync
+requests; under ASGI, queries run in other threads. A request that runs
+more than INSTRUMENTATION_QUERY_BUDGET queries is logged with its most
+repeated statement, the usual sign of an N+1 pattern.
+"""
+import hmac
+import logging
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+UNMATCHED = "<unmatched>"
+# Other methods share one label, so clients cannot add series
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _ShardOwner:
+    """Held only by a thread's local storage, so it dies with the thread."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard: Dict):
+        self.shard = shard
+
+
+class _Sharded:
+    """Metric whose series live in one dict per live thread."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        # Series of threads that have ended
+        self._retired: Dict = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _ShardOwner({})
+            weakref.finalize(owner, self._retire, owner.shard)
+            # Once per thread; observing never takes the lock
+            with self._shards_lock:
+                self._shards.append(owner.shard)
+        return owner.shard
+
+    def _retire(self, shard: Dict):
+        """Fold the shard of a thread that has ended into the shared total."""
+        with self._shards_lock:
+            self._shards.remove(shard)
+            for labels, values in shard.items():
+                total = self._retired.get(labels)
+                if total is None:
+                    self._retired[labels] = list(values)
+                else:
+                    for i, value in enumerate(values):
+                        total[i] += value
+
+    def _series(self):
+        """(labels, values) of the retired total and every shard; values are copied."""
+        with self._shards_lock:
+            # Copied under the lock, retiring a shard changes the total
+            retired = {labels: list(values) for labels, values in self._retired.items()}
+            shards = [retired] + self._shards
+        for shard in shards:
+            for labels, values in list(shard.items()):
+                yield labels, list(values)
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels: Labels, amount: float = 1):
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            values = shard[labels] = [0]
+        values[0] += amount
+
+    def collect(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for labels, values in self._series():
+            totals[labels] = totals.get(labels, 0) + values[0]
+        return totals
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {value}" for labels, value in sorted(self.collect().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float):
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            # One count per bucket plus +Inf, then the sum
+            values = shard[labels] = [0] * (len(self.buckets) + 1) + [0]
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        merged: Dict[Labels, List[float]] = {}
+        for labels, values in self._series():
+            total = merged.get(labels)
+            if total is None:
+                merged[labels] = values
+            else:
+                for i, value in enumerate(values):
+                    total[i] += value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, values in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Wall time per request", TIME_BUCKETS)
+DB_SECONDS = Histogram("http_request_db_duration_seconds", "Database time per request", TIME_BUCKETS)
+DB_QUERIES = Histogram("http_request_db_queries", "Database queries per request", QUERY_BUCKETS)
+RESPONSE_BYTES = Histogram("http_response_size_bytes", "Response body size", SIZE_BUCKETS)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "http_request_query_budget_exceeded_total", "Requests that ran more queries than the budget"
+)
+
+METRICS = [REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, RESPONSE_BYTES, QUERY_BUDGET_EXCEEDED]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class QueryRecorder:
+    """Execute wrapper that times and counts queries, by statement."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Dict[str, int] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+
+def _view_labels(request) -> Labels:
+    match = getattr(request, "resolver_match", None)
+    view = (match.view_name or match.route) if match else UNMATCHED
+    method = request.method if request.method in METHODS else "OTHER"
+    return (("view", view), ("method", method))
+
+
+def _response_size(response) -> int:
+    if response.streaming:
+        return int(response.get("Content-Length") or 0)
+    return len(response.content)
+
+
+class InstrumentationMiddleware:
+    """Record per-view request metrics; see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.aliases = list(connections)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        # What connection.execute_wrapper() does, without its context
+        # manager overhead
+        wrappers = [connections[alias].execute_wrappers for alias in self.aliases]
+        for execute_wrappers in wrappers:
+            execute_wrappers.append(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            for execute_wrappers in wrappers:
+                execute_wrappers.remove(recorder)
+        elapsed = time.perf_counter() - start
+
+        labels = _view_labels(request)
+        self.record(labels, elapsed, response)
+        DB_SECONDS.observe(labels, recorder.seconds)
+        DB_QUERIES.observe(labels, recorder.count)
+        if recorder.count > settings.INSTRUMENTATION_QUERY_BUDGET:
+            self.flag_queries(labels, recorder)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(_view_labels(request), time.perf_counter() - start, response)
+        return response
+
+    @staticmethod
+    def record(labels: Labels, elapsed: float, response):
+        REQUEST_SECONDS.observe(labels, elapsed)
+        RESPONSE_BYTES.observe(labels, _response_size(response))
+
+    @staticmethod
+    def flag_queries(labels: Labels, recorder: QueryRecorder):
+        QUERY_BUDGET_EXCEEDED.inc(labels)
+        sql, repeats = max(recorder.statements.items(), key=lambda item: item[1])
+        view = dict(labels)["view"]
+        logger.warning(
+            f"{view} ran {recorder.count} queries (budget {settings.INSTRUMENTATION_QUERY_BUDGET}); "
+            f"most repeated, {repeats} times, possible N+1: {sql[:300]}"
+        )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for staff users or the METRICS_TOKEN bearer token."""
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    authorized = bool(token) and hmac.compare_digest(authorization, f"Bearer {token}")
+    user = getattr(request, "user", None)
+    if not (authorized or (user is not None and user.is_staff)):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
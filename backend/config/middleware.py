@@ -0,0 +1,38 @@
+from asyncio import iscoroutine
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also runs natively under ASGI.
+
+    The stock middleware is sync-only, which makes Django hand every request
+    to a thread for the rest of the stack, including async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # WhiteNoise 6.8 (pinned in requirements.txt) only has a sync
+        # __call__: it serves static files itself and otherwise returns
+        # get_response(request), here a coroutine to await. Reusing it keeps
+        # WhiteNoise's private file lookup out of this class;
+        # resume.tests.StaticFilesTests checks the contract on upgrades.
+        response = super().__call__(request)
+        if iscoroutine(response):
+            response = await response
+        return response
@@ -1,31 +1,81 @@
 import json
+import secrets
+
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer
 
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+# Marks where pre-encoded fragments go in the encoded output
+_FRAGMENT_TOKEN = secrets.token_hex(8)
+
+
+class RawJSON(bytes):
+    """
+    Pre-encoded UTF-8 JSON value. The renderer splices it into the output
+    as is, so cached payload sections are not decoded and encoded again.
+    """
+
 
 class UnicodeJSONRenderer(JSONRenderer):
-    """JSON renderer that preserves Unicode characters (emojis, etc.)"""
-    
+    """
+    JSON renderer that preserves Unicode characters (emojis, etc.)
+
+    Writes UTF-8 bytes directly with orjson when it is installed, falling
+    back to the stdlib encoder for indented output, values orjson cannot
+    encode (such as integers outside 64 bits), or when JSON_RENDERER is
+    "stdlib". The two only differ in how floats are written: orjson renders
+    NaN and Infinity as null and exponents without padding or a plus sign
+    (1e16 and 1e-7 rather than 1e+16 and 1e-07). API payloads hold strings
+    and integers, so both produce the same bytes for them.
+    """
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         if data is None:
             return b''
-        
+
         renderer_context = renderer_context or {}
         indent = self.get_indent(accepted_media_type, renderer_context)
-        
-        if indent is None:
-            separators = (',', ':')
-        else:
-            separators = (',', ': ')
-        
-        ret = json.dumps(
-            data,
-            cls=self.encoder_class,
-            ensure_ascii=False,
-            allow_nan=not self.strict,
-            indent=indent,
-            separators=separators
-        )
-        
-        return ret.encode('utf-8')
 
+        fragments = []
+        encoder = self.encoder_class()
+
+        def default(obj):
+            if isinstance(obj, RawJSON):
+                fragments.append(obj)
+                return f"\x00{_FRAGMENT_TOKEN}:{len(fragments) - 1}\x00"
+            return encoder.default(obj)
+
+        ret = None
+        if indent is None and orjson is not None and settings.JSON_RENDERER != "stdlib":
+            try:
+                ret = orjson.dumps(
+                    data,
+                    default=default,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                )
+            except orjson.JSONEncodeError:
+                fragments.clear()
+
+        if ret is None:
+            if indent is None:
+                separators = (',', ':')
+            else:
+                separators = (',', ': ')
+
+            ret = json.dumps(
+                data,
+                cls=self.encoder_class,
+                default=default,
+                ensure_ascii=False,
+                allow_nan=not self.strict,
+                indent=indent,
+                separators=separators
+            ).encode('utf-8')
 
+        for index, fragment in enumerate(fragments):
+            ret = ret.replace(f'"\\u0000{_FRAGMENT_TOKEN}:{index}\\u0000"'.encode(), fragment, 1)
+        return ret
@@ -23,12 +23,14 @@ INSTALLED_APPS = [
     "rest_framework",
     "corsheaders",
     "ai",
+    "rag",
     "resume",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "config.middleware.WhiteNoiseMiddleware",
+    "config.instrumentation.InstrumentationMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -77,6 +79,58 @@ else:
         }
     }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "portfolio"),
+    }
+}
+
+# Cache alias and lifetime for materialized API payload snapshots
+SNAPSHOT_CACHE_ALIAS = os.getenv("SNAPSHOT_CACHE_ALIAS", "default")
+SNAPSHOT_CACHE_TIMEOUT = int(os.getenv("SNAPSHOT_CACHE_TIMEOUT", "86400"))
+
+# With a process-local cache, servers apply invalidations made by other
+# processes (management commands, other workers) within this many seconds;
+# 0 disables it
+INVALIDATION_SYNC_INTERVAL = float(os.getenv("INVALIDATION_SYNC_INTERVAL", "2"))
+
+# Snapshots from this size on are also stored gzip (and brotli) compressed;
+# compression runs once per content change, so the levels can be high
+SNAPSHOT_COMPRESS_MIN_SIZE = int(os.getenv("SNAPSHOT_COMPRESS_MIN_SIZE", "512"))
+SNAPSHOT_GZIP_LEVEL = int(os.getenv("SNAPSHOT_GZIP_LEVEL", "9"))
+SNAPSHOT_BROTLI_QUALITY = int(os.getenv("SNAPSHOT_BROTLI_QUALITY", "11"))
+
+# Copy content into newly added site languages in a background thread
+# instead of during the admin request that adds them
+LANGUAGE_DUPLICATION_ASYNC = os.getenv("LANGUAGE_DUPLICATION_ASYNC", "0") == "1"
+
+# Build the AI resume context for all languages when the server starts
+AI_CONTEXT_WARMUP = os.getenv("AI_CONTEXT_WARMUP", "1") == "1"
+
+# Server-side AI chat history: sessions kept in memory, their lifetime in
+# seconds, and how many recent turns are sent to the model
+AI_CONVERSATION_MAX_SESSIONS = int(os.getenv("AI_CONVERSATION_MAX_SESSIONS", "1000"))
+AI_CONVERSATION_TTL = int(os.getenv("AI_CONVERSATION_TTL", "3600"))
+AI_CONVERSATION_MAX_TURNS = int(os.getenv("AI_CONVERSATION_MAX_TURNS", "6"))
+
+# Cached answers to first questions: lifetime in seconds, and the token
+# overlap (0-1) at which a reworded question reuses an answer
+AI_ANSWER_CACHE_TTL = int(os.getenv("AI_ANSWER_CACHE_TTL", "86400"))
+AI_ANSWER_CACHE_SIMILARITY = float(os.getenv("AI_ANSWER_CACHE_SIMILARITY", "0.8"))
+
+# Number of resume chunks retrieved for each AI question; 0 sends the
+# whole resume
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+
+# Visits are buffered in memory and written in bulk by a background thread
+# every VISIT_FLUSH_INTERVAL seconds or once VISIT_FLUSH_SIZE sessions are
+# waiting. Set VISIT_WRITE_BEHIND=0 to write them during the request.
+VISIT_WRITE_BEHIND = os.getenv("VISIT_WRITE_BEHIND", "1") == "1"
+VISIT_FLUSH_INTERVAL = float(os.getenv("VISIT_FLUSH_INTERVAL", "5"))
+VISIT_FLUSH_SIZE = int(os.getenv("VISIT_FLUSH_SIZE", "100"))
+VISIT_BUFFER_MAX_SESSIONS = int(os.getenv("VISIT_BUFFER_MAX_SESSIONS", "10000"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -115,6 +169,50 @@ CSRF_COOKIE_HTTPONLY = False  # Allow JavaScript to read csrftoken cookie
 CSRF_COOKIE_SAMESITE = 'Lax'
 CSRF_USE_SESSIONS = False
 
+# Per-view latency, query and response size histograms, scraped from
+# /metrics/ by staff users or with "Authorization: Bearer <METRICS_TOKEN>".
+# Requests over the query budget are logged as possible N+1 patterns.
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "1") == "1"
+INSTRUMENTATION_QUERY_BUDGET = int(os.getenv("INSTRUMENTATION_QUERY_BUDGET", "20"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Model provider for AI chat: "gemini", or "fake" for a local stand-in used
+# in load tests (overridden by the ai_provider setting). The fake model's
+# behaviour, overridden by the JSON in the ai_fake_options setting:
+AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini")
+AI_FAKE_LATENCY_MS = float(os.getenv("AI_FAKE_LATENCY_MS", "500"))
+AI_FAKE_TOKENS_PER_SECOND = float(os.getenv("AI_FAKE_TOKENS_PER_SECOND", "50"))
+AI_FAKE_ERROR_RATE = float(os.getenv("AI_FAKE_ERROR_RATE", "0"))
+AI_FAKE_RATE_LIMIT_RATE = float(os.getenv("AI_FAKE_RATE_LIMIT_RATE", "0"))
+AI_FAKE_RATE_LIMIT_RPM = int(os.getenv("AI_FAKE_RATE_LIMIT_RPM", "0"))
+AI_FAKE_SEED = int(os.getenv("AI_FAKE_SEED")) if os.getenv("AI_FAKE_SEED") else None
+
+# Admission control for model calls: calls in progress per process, and how
+# long a call may queue for a slot, in seconds. AI_RATE_LIMIT_RPM should match
+# the API quota (0 for no limit); with AI_RATE_LIMIT_SHARED=1 it is counted in
+# the cache, across processes. Identical concurrent questions share one call,
+# waited for at most AI_INFLIGHT_WAIT_TIMEOUT seconds.
+AI_MAX_CONCURRENT_CALLS = int(os.getenv("AI_MAX_CONCURRENT_CALLS", "8"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "10"))
+AI_RATE_LIMIT_RPM = float(os.getenv("AI_RATE_LIMIT_RPM", "0"))
+AI_RATE_LIMIT_BURST = int(os.getenv("AI_RATE_LIMIT_BURST", "0"))
+AI_RATE_LIMIT_SHARED = os.getenv("AI_RATE_LIMIT_SHARED", "0") == "1"
+AI_INFLIGHT_WAIT_TIMEOUT = float(os.getenv("AI_INFLIGHT_WAIT_TIMEOUT", "60"))
+
+# Model calls time out after AI_REQUEST_TIMEOUT seconds. The circuit breaker
+# opens when AI_CIRCUIT_FAILURE_RATE of at least AI_CIRCUIT_MIN_CALLS calls in
+# the last AI_CIRCUIT_WINDOW seconds failed, then fails calls fast for
+# AI_CIRCUIT_OPEN_SECONDS before probing the API again.
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))
+AI_CIRCUIT_WINDOW = float(os.getenv("AI_CIRCUIT_WINDOW", "60"))
+AI_CIRCUIT_MIN_CALLS = int(os.getenv("AI_CIRCUIT_MIN_CALLS", "5"))
+AI_CIRCUIT_FAILURE_RATE = float(os.getenv("AI_CIRCUIT_FAILURE_RATE", "0.5"))
+AI_CIRCUIT_OPEN_SECONDS = float(os.getenv("AI_CIRCUIT_OPEN_SECONDS", "30"))
+
+# JSON encoder for API responses: "auto" uses orjson when it is installed,
+# "stdlib" always uses the json module
+JSON_RENDERER = os.getenv("JSON_RENDERER", "auto")
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -21,6 +21,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 
+from config.instrumentation import metrics_view
+
 
 def home_view(request):
     return HttpResponse(
@@ -32,6 +34,7 @@ def home_view(request):
 urlpatterns = [
     path("", home_view, name="home"),
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view, name="metrics"),
     path("api/ai/", include("ai.urls")),
     path("api/", include("resume.urls")),
 ]
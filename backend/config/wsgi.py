@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+from ai.services.resume_context import start_warm_up  # noqa: E402
+from resume.invalidation import start_sync  # noqa: E402
+
+start_warm_up()
+start_sync()
@@ -0,0 +1,100 @@
+"""
+In-memory BM25 index.
+
+Documents can be added and removed one at a time, so an index is kept up
+to date by re-indexing only the chunks whose text changed.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens with plural "s" folded. Scripts written without
+    spaces are split into character bigrams.
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        if _CJK_RE.search(word):
+            if len(word) == 1:
+                tokens.append(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            tokens.append(word[:-1])
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a mutable set of documents."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, Tuple[str, Counter, int]] = {}
+        self._df: Counter = Counter()
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._docs
+
+    def text(self, key: str) -> str:
+        return self._docs[key][0]
+
+    def add(self, key: str, text: str):
+        """Index a document, replacing any previous version with the same key."""
+        if key in self._docs:
+            if self._docs[key][0] == text:
+                return
+            self.remove(key)
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        self._docs[key] = (text, counts, len(tokens))
+        self._df.update(counts.keys())
+        self._total_length += len(tokens)
+
+    def remove(self, key: str):
+        text, counts, length = self._docs.pop(key)
+        self._df.subtract(counts.keys())
+        for term in counts:
+            if self._df[term] <= 0:
+                del self._df[term]
+        self._total_length -= length
+
+    def keys(self) -> Iterable[str]:
+        return self._docs.keys()
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        """Top documents for a query, best first; documents scoring 0 are left out."""
+        terms = set(tokenize(query)) & self._df.keys()
+        if not terms or not self._docs:
+            return []
+
+        count = len(self._docs)
+        average_length = self._total_length / count or 1
+        idf = {
+            term: math.log(1 + (count - self._df[term] + 0.5) / (self._df[term] + 0.5))
+            for term in terms
+        }
+
+        scores = []
+        for key, (_, counts, length) in self._docs.items():
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / average_length)
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((key, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:limit]
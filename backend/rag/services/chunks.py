@@ -0,0 +1,126 @@
+"""
+Split resume content into retrievable chunks.
+
+Each experience, education entry, certificate and project is its own
+chunk, skills are chunked per category, and the short spoken-language and
+contact lists are one chunk each. The profile chunk (name, title, about)
+is always sent to the model.
+"""
+from dataclasses import dataclass
+from typing import List
+
+PROFILE = "profile"
+
+# Section order and headings, matching the full resume context
+SECTIONS = [
+    (PROFILE, ""),
+    ("experience", "## Experience"),
+    ("skills", "## Skills"),
+    ("education", "## Education"),
+    ("certificates", "## Certificates"),
+    ("projects", "## Projects"),
+    ("languages", "## Languages"),
+    ("contact", "## Contact"),
+]
+
+
+# Words visitors use to ask about a section, indexed with each of its chunks
+SECTION_KEYWORDS = {
+    "experience": "experience work worked job career company position role",
+    "skills": "skills technologies stack tools know",
+    "education": "education study studied university degree school",
+    "certificates": "certificates certifications courses",
+    "projects": "projects built portfolio",
+    "languages": "languages speak spoken",
+    "contact": "contact email phone reach",
+}
+
+
+@dataclass(frozen=True)
+class Chunk:
+    key: str
+    section: str
+    text: str
+
+
+def build_chunks(language: str) -> List[Chunk]:
+    """Chunks for all resume content in a language, in display order."""
+    from resume.models import (
+        Resume, Experience, Education, Skill,
+        Certificate, Project, Language as LangModel, ContactInfo
+    )
+
+    chunks = []
+
+    resume = Resume.objects.filter(language=language).first()
+    if resume:
+        chunks.append(Chunk(PROFILE, PROFILE, "\n".join([
+            f"# {resume.firstname} {resume.lastname}",
+            f"**{resume.resume_title}**",
+            f"\n{resume.resume_description}",
+            f"\n## About\n{resume.about_me}",
+        ])))
+
+    for exp in Experience.objects.filter(language=language).order_by('order'):
+        chunks.append(Chunk(f"experience:{exp.pk}", "experience", "\n".join([
+            f"\n### {exp.position} at {exp.company}",
+            f"{exp.start_date} - {exp.end_date}",
+            exp.description,
+        ])))
+
+    categories = {}
+    for skill in Skill.objects.filter(language=language).order_by('category_name_key', 'order'):
+        categories.setdefault(skill.category_name, []).append(f"- {skill.name}")
+    for category, lines in categories.items():
+        chunks.append(Chunk(
+            f"skills:{category}", "skills", "\n".join([f"\n**{category}:**"] + lines)
+        ))
+
+    for edu in Education.objects.filter(language=language).order_by('order'):
+        location = f", {edu.location}" if edu.location else ""
+        faculty = f" - {edu.faculty}" if edu.faculty else ""
+        chunks.append(Chunk(
+            f"education:{edu.pk}", "education",
+            f"- {edu.degree}{faculty} at {edu.institution}{location} ({edu.year})"
+        ))
+
+    for cert in Certificate.objects.filter(language=language).order_by('order'):
+        year = f" ({cert.year})" if cert.year else ""
+        chunks.append(Chunk(f"certificates:{cert.pk}", "certificates", f"- {cert.name}{year}"))
+
+    for proj in Project.objects.filter(language=language).order_by('order'):
+        lines = [f"\n### {proj.title}", proj.description]
+        if proj.technologies:
+            lines.append(f"Technologies: {', '.join(proj.technologies)}")
+        chunks.append(Chunk(f"projects:{proj.pk}", "projects", "\n".join(lines)))
+
+    languages = LangModel.objects.filter(language=language).order_by('order')
+    if languages:
+        chunks.append(Chunk("languages", "languages", "\n".join(
+            f"- {lang.name}: {lang.level}" for lang in languages
+        )))
+
+    contacts = ContactInfo.objects.filter(language=language).order_by('order')
+    if contacts:
+        chunks.append(Chunk("contact", "contact", "\n".join(
+            f"- {contact.label}: {contact.value}" for contact in contacts
+        )))
+
+    return chunks
+
+
+def render_chunks(chunks: List[Chunk]) -> str:
+    """Join chunks into resume context, one heading per section."""
+    by_section = {}
+    for chunk in chunks:
+        by_section.setdefault(chunk.section, []).append(chunk.text)
+
+    parts = []
+    for section, heading in SECTIONS:
+        texts = by_section.get(section)
+        if not texts:
+            continue
+        if heading:
+            parts.append(f"\n{heading}")
+        parts.extend(texts)
+    return "\n".join(parts)
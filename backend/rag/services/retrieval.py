@@ -0,0 +1,110 @@
+"""
+Retrieval of relevant resume chunks for the AI chat.
+
+Instead of the whole resume, the model gets the profile chunk plus the
+chunks that best match the visitor's question. Chunks are rebuilt when
+the ai_context generation for a language changes, and the per-language
+BM25 index only re-indexes chunks whose text changed.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import List
+
+from django.conf import settings
+
+from resume import invalidation
+from .bm25 import BM25Index
+from .chunks import PROFILE, SECTION_KEYWORDS, Chunk, build_chunks, render_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class Retriever:
+    """BM25 index over the resume chunks of one language."""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.generation = None
+        self.index = BM25Index()
+        self.chunks: List[Chunk] = []
+        self._lock = threading.Lock()
+
+    def refresh(self, generation: str, chunks: List[Chunk]):
+        """Bring the index up to date with the given chunks."""
+        with self._lock:
+            if self.generation == generation:
+                return
+            keys = {chunk.key for chunk in chunks}
+            for key in [key for key in self.index.keys() if key not in keys]:
+                self.index.remove(key)
+            for chunk in chunks:
+                if chunk.key != PROFILE:
+                    self.index.add(chunk.key, f"{SECTION_KEYWORDS[chunk.section]}\n{chunk.text}")
+            self.chunks = chunks
+            self.generation = generation
+
+    def search(self, query: str, top_k: int) -> List[Chunk]:
+        """The profile chunk plus the top_k matches, in resume order."""
+        with self._lock:
+            chunks = self.chunks
+            keys = {key for key, _ in self.index.search(query, top_k)}
+        if not keys:
+            return []
+        return [chunk for chunk in chunks if chunk.key == PROFILE or chunk.key in keys]
+
+
+# Retrievers are kept in LRU order; the chat views resolve site languages,
+# this only bounds memory should a caller pass something else
+MAX_RETRIEVERS = 64
+
+_retrievers: "OrderedDict[str, Retriever]" = OrderedDict()
+_retrievers_lock = threading.Lock()
+
+
+def get_chunks(language: str, generation: str) -> List[Chunk]:
+    """Resume chunks for a language, shared through the cache."""
+    cache = invalidation.get_cache()
+    key = f"rag:chunks:{language}"
+    chunks = cache.get(key, version=generation)
+    if chunks is None:
+        chunks = build_chunks(language)
+        cache.set(key, chunks, timeout=settings.SNAPSHOT_CACHE_TIMEOUT, version=generation)
+    return chunks
+
+
+def get_retriever(language: str) -> Retriever:
+    """Return the up-to-date retriever for a language."""
+    generation = invalidation.get_generation(invalidation.AI_CONTEXT, language)
+    with _retrievers_lock:
+        retriever = _retrievers.get(language)
+        if retriever is None:
+            retriever = _retrievers[language] = Retriever(language)
+            while len(_retrievers) > MAX_RETRIEVERS:
+                _retrievers.popitem(last=False)
+        else:
+            _retrievers.move_to_end(language)
+    if retriever.generation != generation:
+        retriever.refresh(generation, get_chunks(language, generation))
+    return retriever
+
+
+def get_prompt_context(language: str, query: str, top_k: int = None) -> str:
+    """
+    Resume context for answering a question: the profile and the top_k
+    most relevant chunks. Falls back to the whole resume when nothing
+    matches the question or retrieval is disabled (RAG_TOP_K = 0).
+    """
+    from ai.services.resume_context import get_resume_context
+
+    if top_k is None:
+        top_k = settings.RAG_TOP_K
+    if top_k > 0:
+        try:
+            retriever = get_retriever(language)
+            chunks = retriever.search(query, top_k)
+            # The retriever holds every chunk, so no need to read the resume again
+            return render_chunks(chunks or retriever.chunks)
+        except Exception as e:
+            logger.warning(f"Resume retrieval failed: {e}")
+    return get_resume_context(language)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ai.services.resume_context import build_resume_context
+from resume.invalidation import get_cache
+from resume.models import Resume, Experience, Project, Skill
+
+from .services import bm25, retrieval
+from .services.bm25 import BM25Index, tokenize
+
+
+class TokenizeTests(SimpleTestCase):
+    """Questions and chunks are split into the same tokens in every script."""
+
+    def test_words_are_lowercased_and_plurals_folded(self):
+        self.assertEqual(tokenize('Built REST APIs, projects and classes; bus'),
+                         ['built', 'rest', 'api', 'project', 'and', 'classe', 'bus'])
+        self.assertEqual(tokenize('Django class'), ['django', 'class'])
+        self.assertEqual(tokenize('Проекты на Python'), ['проекты', 'на', 'python'])
+
+    def test_scripts_without_spaces_are_split_into_bigrams(self):
+        self.assertEqual(tokenize('数据库'), ['数据', '据库'])
+        self.assertEqual(tokenize('我 Python'), ['我', 'python'])
+
+
+class BM25IndexTests(SimpleTestCase):
+    """The index ranks with BM25 and stays consistent as documents change."""
+
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add('python', 'Python developer building Django APIs in Python')
+        self.index.add('go', 'Go developer building services')
+        self.index.add('design', 'Interface design')
+
+    def test_ranks_by_term_frequency_and_rarity(self):
+        self.assertEqual([key for key, _ in self.index.search('python developer', 3)], ['python', 'go'])
+        # "design" is rarer than "developer"
+        self.assertEqual([key for key, _ in self.index.search('developer design', 3)][0], 'design')
+        # Same term frequency, the shorter document ranks first
+        self.assertEqual([key for key, _ in self.index.search('developer', 1)], ['go'])
+
+    def test_no_match_returns_nothing(self):
+        self.assertEqual(self.index.search('kubernetes', 3), [])
+        self.assertEqual(BM25Index().search('python', 3), [])
+
+    def test_documents_are_replaced_and_removed(self):
+        self.index.add('go', 'Rust developer')
+        self.assertEqual(self.index.search('go', 3), [])
+        self.assertEqual([key for key, _ in self.index.search('rust', 3)], ['go'])
+        self.index.remove('go')
+        self.assertNotIn('go', self.index)
+        self.assertEqual(self.index._df['developer'], 1)
+        self.assertNotIn('rust', self.index._df)
+
+
+class RetrievalTests(TestCase):
+    """Retrieval sends the profile plus matching chunks, reading the resume once."""
+
+    def setUp(self):
+        get_cache().clear()
+        retrieval._retrievers.clear()
+        Resume.objects.create(language='en', firstname='Ada', lastname='Lovelace', resume_title='Engineer',
+                              resume_description='Backend engineer', about_me='Likes engines')
+        Experience.objects.create(company='Acme', position='Python Developer', start_date='Jan 2020',
+                                  end_date='Present', description='Django services', language='en', order=1)
+        Skill.objects.create(name='PostgreSQL', category_name='Databases', category_name_key='databases',
+                             language='en', order=1)
+        self.project = Project.objects.create(code='a', title='Telescope', description='Star tracker',
+                                              technologies=['Rust'], language='en', order=1)
+
+    def test_matching_chunks_with_profile(self):
+        context = retrieval.get_prompt_context('en', 'Which databases do you know?', top_k=1)
+        self.assertIn('# Ada Lovelace', context)
+        self.assertIn('- PostgreSQL', context)
+        self.assertNotIn('Telescope', context)
+        self.assertNotIn('Acme', context)
+
+    def test_falls_back_to_full_context_reading_resume_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            context = retrieval.get_prompt_context('en', 'Hello there!', top_k=1)
+        self.assertEqual(context, build_resume_context('en'))
+        resume_queries = [query for query in queries if 'FROM "resume" ' in query['sql']]
+        self.assertEqual(len(resume_queries), 1)
+
+    def test_changed_chunks_are_reindexed_on_generation_change(self):
+        retriever = retrieval.get_retriever('en')
+        with self.captureOnCommitCallbacks(execute=True):
+            Project.objects.filter(pk=self.project.pk).update(description='Comet tracker')
+        with mock.patch.object(bm25, 'tokenize', wraps=bm25.tokenize) as tokenize_spy:
+            self.assertIs(retrieval.get_retriever('en'), retriever)
+        # Only the edited project is indexed again
+        tokenize_spy.assert_called_once()
+        self.assertEqual([chunk.key for chunk in retriever.search('comet', 1)],
+                         ['profile', f'projects:{self.project.pk}'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        retrieval.get_retriever('en')
+        self.assertNotIn(f'projects:{self.project.pk}', retriever.index)
@@ -0,0 +1,164 @@
+"""
+Copying resume content into a newly added site language.
+
+Each model is copied with one query for the source rows, one for the keys
+already present in the target language and bulk inserts for the rest, all
+inside one transaction per target language, so a failure leaves nothing
+half copied. Rows are matched on their natural key where the model has
+one (Project code, Translation key, one Resume per language); other
+models are only copied while the target language has none of their rows,
+so running a duplication twice does not copy anything twice.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional
+
+from django.db import connections, transaction
+
+from . import invalidation
+from .models import (
+    Resume, Language, Skill, Experience, Education,
+    Certificate, Project, ContactInfo, Translation
+)
+
+logger = logging.getLogger(__name__)
+
+# Models that have language field and should be duplicated
+DUPLICATED_MODELS = [
+    Resume, Language, Skill, Experience, Education,
+    Certificate, Project, ContactInfo, Translation
+]
+
+# Fields that identify a row within one language
+NATURAL_KEYS = {
+    Resume: (),
+    Project: ('code',),
+    Translation: ('key',),
+}
+
+BATCH_SIZE = 500
+
+
+@dataclass
+class ModelReport:
+    model: str
+    source: int = 0
+    skipped: int = 0
+    created: int = 0
+
+
+@dataclass
+class DuplicationReport:
+    source_lang: str
+    target_lang: str
+    dry_run: bool = False
+    models: List[ModelReport] = field(default_factory=list)
+
+    @property
+    def created(self) -> int:
+        return sum(report.created for report in self.models)
+
+    @property
+    def skipped(self) -> int:
+        return sum(report.skipped for report in self.models)
+
+
+def existing_languages() -> set:
+    """Languages that have rows in any duplicated model, in one query."""
+    querysets = [model.objects.order_by().values_list('language', flat=True) for model in DUPLICATED_MODELS]
+    return set(querysets[0].union(*querysets[1:]))
+
+
+def choose_source_language(languages: Iterable[str]) -> Optional[str]:
+    """Prefer 'en', then the first language in code order."""
+    languages = set(languages)
+    if 'en' in languages:
+        return 'en'
+    return min(languages, default=None)
+
+
+def _missing_rows(model, source_lang, target_lang):
+    """Source rows that have no counterpart in the target language yet."""
+    sources = list(model.objects.filter(language=source_lang).order_by('pk'))
+    targets = model.objects.filter(language=target_lang)
+    key_fields = NATURAL_KEYS.get(model)
+
+    if key_fields is None:
+        # No natural key: copy only into a language without rows
+        return sources, ([] if targets.exists() else sources)
+    if not key_fields:
+        # One row per language
+        return sources, ([] if targets.exists() else sources[:1])
+
+    existing = set(targets.values_list(*key_fields))
+    return sources, [
+        row for row in sources
+        if tuple(getattr(row, name) for name in key_fields) not in existing
+    ]
+
+
+def duplicate_language(source_lang: str, target_lang: str, dry_run: bool = False,
+                       progress: Optional[Callable[[ModelReport], None]] = None) -> DuplicationReport:
+    """
+    Copy every duplicated model's rows from source_lang to target_lang.
+    With dry_run nothing is written and the report shows what would be.
+    `progress` is called with each model's report once it is done.
+    """
+    report = DuplicationReport(source_lang=source_lang, target_lang=target_lang, dry_run=dry_run)
+
+    with transaction.atomic(), invalidation.batch():
+        for model in DUPLICATED_MODELS:
+            sources, missing = _missing_rows(model, source_lang, target_lang)
+            model_report = ModelReport(
+                model=model.__name__, source=len(sources), skipped=len(sources) - len(missing)
+            )
+
+            if missing and not dry_run:
+                for row in missing:
+                    row.pk = None
+                    row.language = target_lang
+                    # Set again on insert by auto_now_add / auto_now
+                    if hasattr(row, 'created_at'):
+                        row.created_at = None
+                    if hasattr(row, 'updated_at'):
+                        row.updated_at = None
+                model.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+            model_report.created = len(missing)
+
+            report.models.append(model_report)
+            if progress:
+                progress(model_report)
+
+    logger.info(
+        f"{'Would duplicate' if dry_run else 'Duplicated'} {report.created} rows "
+        f"from '{source_lang}' to '{target_lang}' ({report.skipped} already present)"
+    )
+    return report
+
+
+def duplicate_languages(source_lang: str, target_langs: Iterable[str]):
+    """Duplicate into several languages; a failure only rolls back its own language."""
+    for target_lang in sorted(target_langs):
+        try:
+            duplicate_language(source_lang, target_lang)
+        except Exception as e:
+            logger.exception(f"Failed to duplicate content to '{target_lang}': {e}")
+
+
+def _run_in_background(source_lang: str, target_langs: Iterable[str]):
+    try:
+        duplicate_languages(source_lang, target_langs)
+    finally:
+        connections.close_all()
+
+
+def start_duplication(source_lang: str, target_langs: Iterable[str]):
+    """Duplicate in a background thread once the current transaction commits."""
+    target_langs = set(target_langs)
+    transaction.on_commit(lambda: threading.Thread(
+        target=_run_in_background,
+        args=(source_lang, target_langs),
+        name="language-duplication",
+        daemon=True,
+    ).start())
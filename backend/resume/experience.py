@@ -0,0 +1,159 @@
+"""
+Years of experience for the resume stats.
+
+Experience dates are free text such as "Aug 2024", "Авг 2024" or
+"Present". Month names and "present" come from translations and are
+compiled once per translation version into a prefix trie, so parsing a
+date is a single walk over its first word.
+
+The figure is computed from the English experience rows, with
+overlapping periods merged so concurrent jobs are not counted twice, and
+cached until experience or date translations change. "Present" means
+now, so the current month is part of the cache key.
+"""
+import calendar
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db.models import Q
+
+from . import invalidation
+from .models import Experience, Translation
+
+# (version, value) pairs; replaced whole, so readers never see a mix
+_parser_memo = (None, None)
+_years_memo = (None, None)
+
+
+class MonthTrie:
+    """Prefix trie from lowercase month names to month numbers."""
+
+    def __init__(self):
+        self._root: Dict = {}
+
+    def add(self, name: str, month: int):
+        node = self._root
+        for char in name:
+            node = node.setdefault(char, {})
+        node.setdefault(None, month)
+
+    def longest_prefix(self, text: str) -> Optional[int]:
+        """Month of the longest name that text starts with."""
+        node, month = self._root, None
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            month = node.get(None, month)
+        return month
+
+
+class DateParser:
+    """Parses experience dates with month names from every language."""
+
+    def __init__(self, months: MonthTrie, present: Iterable[str]):
+        self.months = months
+        self.present = frozenset(present)
+        # English names are matched exactly when no translation matches
+        self.en_months = {month.lower(): i for i, month in enumerate(calendar.month_abbr[1:], 1)}
+        self.en_months.update({month.lower(): i for i, month in enumerate(calendar.month_name[1:], 1)})
+
+    @classmethod
+    def compile(cls) -> "DateParser":
+        months = MonthTrie()
+        present = []
+        rows = Translation.objects.filter(Q(key__startswith='month_') | Q(key='present'))
+        for key, value in rows.values_list('key', 'value'):
+            if key == 'present':
+                present.append(value.lower())
+            elif key.endswith('_full') or key.endswith('_short'):
+                # month_1_full -> 1, month_12_short -> 12
+                months.add(value.lower(), int(key.split('_')[1]))
+        return cls(months, present)
+
+    def parse(self, date_str: str, now: datetime) -> datetime:
+        """Parse 'Aug 2024' or 'Авг 2024'; empty or "present" means now."""
+        if not date_str or date_str.lower() in self.present:
+            return now
+
+        parts = date_str.strip().split()
+        if len(parts) >= 2 and parts[-1].isdigit():
+            month_str = parts[0].lower()
+            month = self.months.longest_prefix(month_str) or self.en_months.get(month_str, 1)
+            return datetime(int(parts[-1]), month, 1)
+
+        # Otherwise take the year from the digits in the string
+        year_str = ''.join(filter(str.isdigit, date_str))
+        if year_str:
+            return datetime(int(year_str), 1, 1)
+        return now
+
+
+def merge_periods(periods: Iterable[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Union of periods; empty and reversed periods are dropped."""
+    merged = []
+    for start, end in sorted(period for period in periods if period[1] > period[0]):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def total_months(periods: Iterable[Tuple[datetime, datetime]]) -> int:
+    months = 0
+    for start, end in merge_periods(periods):
+        delta = relativedelta(end, start)
+        months += max(delta.years * 12 + delta.months, 0)
+    return months
+
+
+def format_years(months: int) -> str:
+    years = months // 12
+    if years > 0:
+        return f"{years}+"
+    return f"{months}+" if months > 0 else "0+"
+
+
+def get_date_parser() -> DateParser:
+    """Return the date parser for the current translations."""
+    global _parser_memo
+    generation = invalidation.get_generation(invalidation.DATE_FORMATS, invalidation.ALL_LANGUAGES)
+    if _parser_memo[0] == generation:
+        return _parser_memo[1]
+    parser = DateParser.compile()
+    _parser_memo = (generation, parser)
+    return parser
+
+
+def compute_years_experience(now: Optional[datetime] = None) -> str:
+    """Years of experience across all English experience entries."""
+    now = now or datetime.now()
+    parser = get_date_parser()
+    periods = [
+        (parser.parse(start, now), parser.parse(end, now))
+        for start, end in Experience.objects.filter(language="en").values_list('start_date', 'end_date')
+    ]
+    return format_years(total_months(periods))
+
+
+def get_years_experience() -> str:
+    """Return years_experience, recomputing only after relevant changes."""
+    global _years_memo
+    now = datetime.now()
+    generation = invalidation.get_generation(invalidation.EXPERIENCE_STATS, invalidation.ALL_LANGUAGES)
+    month = now.strftime("%Y-%m")
+    if _years_memo[0] == (generation, month):
+        return _years_memo[1]
+
+    cache = invalidation.get_cache()
+    key = f"resume:years_experience:{month}"
+    years = cache.get(key, version=generation)
+    if years is None:
+        years = compute_years_experience(now)
+        cache.set(key, years, timeout=settings.SNAPSHOT_CACHE_TIMEOUT, version=generation)
+
+    _years_memo = ((generation, month), years)
+    return years
@@ -0,0 +1,385 @@
+"""
+Cache invalidation bus for resume and AI content.
+
+Every cached artifact belongs to an endpoint (resume payload, translations,
+settings, AI resume context, AI client configuration, ...) and is stored under a generation token
+for one language. A token combines a per-endpoint counter shared by all
+languages with a per-language counter, so a change can invalidate exactly
+the languages it affects.
+
+Model rows map to endpoints through REGISTRY. Saves and deletes are wired
+up in resume.signals; QuerySet.update(), bulk_create() and bulk_update()
+go through InvalidatingQuerySet, which models use as their default manager.
+
+With a process-local cache (LocMemCache, the default) counters are not
+shared, so bumps are also written to the CacheInvalidation table. Server
+processes poll it every INVALIDATION_SYNC_INTERVAL seconds (start_sync(),
+called from the WSGI/ASGI entry points) and apply bumps made elsewhere,
+e.g. by management commands or other workers.
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Cached endpoints
+RESUME = "resume"
+TRANSLATIONS = "translations"
+SETTINGS = "settings"
+AI_CONTEXT = "ai_context"
+AI_CLIENT = "ai_client"
+DATE_FORMATS = "date_formats"
+EXPERIENCE_STATS = "experience_stats"
+
+ALL_LANGUAGES = "*"
+
+_local = threading.local()
+
+
+def per_language(row) -> Optional[str]:
+    return row.language
+
+
+def all_languages(row) -> Optional[str]:
+    return ALL_LANGUAGES
+
+
+def _experience_scope(row) -> Optional[str]:
+    # years_experience in every payload is computed from English experience
+    return ALL_LANGUAGES if row.language == "en" else row.language
+
+
+def _english_experience_scope(row) -> Optional[str]:
+    return ALL_LANGUAGES if row.language == "en" else None
+
+
+def _date_translation_scope(row) -> Optional[str]:
+    # Month names and "present" are used to parse experience dates
+    if row.key == "present" or row.key.startswith("month_"):
+        return ALL_LANGUAGES
+    return None
+
+
+def _site_languages_scope(row) -> Optional[str]:
+    return ALL_LANGUAGES if row.name == "site_languages" else None
+
+
+def _ai_client_scope(row) -> Optional[str]:
+    # API key and model provider settings
+    return ALL_LANGUAGES if row.name in ("gemini_api_key", "ai_provider", "ai_fake_options") else None
+
+
+@dataclass(frozen=True)
+class Dependency:
+    """Cached endpoint affected by a model, and which language a row hits."""
+    endpoint: str
+    scope: Callable = per_language
+    fields: Tuple[str, ...] = ("language",)
+
+
+_CONTENT = (
+    Dependency(RESUME),
+    Dependency(AI_CONTEXT),
+)
+
+REGISTRY = {
+    # Every payload carries names and titles for all site languages
+    "resume.Resume": (Dependency(RESUME, all_languages), Dependency(AI_CONTEXT)),
+    "resume.Experience": (
+        Dependency(RESUME, _experience_scope),
+        Dependency(AI_CONTEXT),
+        Dependency(EXPERIENCE_STATS, _english_experience_scope),
+    ),
+    "resume.Skill": _CONTENT,
+    "resume.Education": _CONTENT,
+    "resume.Certificate": _CONTENT,
+    "resume.Project": _CONTENT,
+    "resume.Language": _CONTENT,
+    "resume.ContactInfo": _CONTENT,
+    "resume.Translation": (
+        Dependency(TRANSLATIONS),
+        Dependency(RESUME, _date_translation_scope, ("key",)),
+        Dependency(DATE_FORMATS, _date_translation_scope, ("key",)),
+        Dependency(EXPERIENCE_STATS, _date_translation_scope, ("key",)),
+    ),
+    "resume.Setting": (
+        Dependency(SETTINGS, all_languages, ()),
+        Dependency(RESUME, _site_languages_scope, ("name",)),
+        Dependency(AI_CLIENT, _ai_client_scope, ("name",)),
+    ),
+    # Analytics only, nothing cached depends on visits or chat logs
+    "resume.Visit": (),
+    "ai.AIChatLog": (),
+}
+
+
+def get_cache():
+    return caches[settings.SNAPSHOT_CACHE_ALIAS]
+
+
+def is_process_local() -> bool:
+    """Whether generation counters live in this process only."""
+    return isinstance(get_cache(), LocMemCache)
+
+
+def _counter_key(endpoint: str, language: str) -> str:
+    return f"generation:{endpoint}:{language}"
+
+
+def _new_generation(current=None) -> int:
+    # Generations are timestamps so a counter evicted from the cache never
+    # restarts at a value that older entries were stored under.
+    generation = time.time_ns() // 1000
+    if current is not None and generation <= current:
+        generation = current + 1
+    return generation
+
+
+def get_generation(endpoint: str, language: str) -> str:
+    """
+    Return the generation token for an endpoint and language.
+    Cached artifacts should be stored under this token as the cache version.
+    """
+    cache = get_cache()
+    keys = [_counter_key(endpoint, ALL_LANGUAGES), _counter_key(endpoint, language)]
+    counters = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in counters}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        counters = cache.get_many(keys)
+    return ".".join(str(counters.get(key, 0)) for key in keys)
+
+
+def changed_at(version: str) -> float:
+    """
+    Unix time of the newest change behind a generation token, or a
+    composite of them; counters are microsecond timestamps.
+    """
+    return max(int(part) for part in re.split(r"[.+]", version)) / 1_000_000
+
+
+def _apply(pairs, record=True):
+    """Advance the counters for a set of (endpoint, language) pairs."""
+    global_endpoints = {endpoint for endpoint, language in pairs if language == ALL_LANGUAGES}
+    keys = {
+        _counter_key(endpoint, language)
+        for endpoint, language in pairs
+        if language == ALL_LANGUAGES or endpoint not in global_endpoints
+    }
+    cache = get_cache()
+    current = cache.get_many(keys)
+    cache.set_many(
+        {key: _new_generation(current.get(key)) for key in keys},
+        timeout=None,
+    )
+    logger.debug(f"Invalidated {sorted(keys)}")
+    if record:
+        invalidation_log.record(pairs)
+
+
+def bump(endpoint: str, language: str = ALL_LANGUAGES):
+    """
+    Invalidate an endpoint for one language, or for all of them.
+    Counters move once the current transaction commits, so readers never
+    rebuild an artifact from data that is about to change.
+    """
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.add((endpoint, language))
+        return
+    pairs = {(endpoint, language)}
+    transaction.on_commit(lambda: _apply(pairs))
+
+
+class InvalidationLog:
+    """Bumps shared through the database; see the module docstring."""
+
+    # Rows older than this have been applied by every live server
+    RETENTION = timedelta(days=1)
+
+    def __init__(self):
+        self.last_id = None
+        self.polling = False
+        # Rows written by this process, already applied here
+        self._own_ids = set()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def record(self, pairs):
+        if not is_process_local():
+            return
+        from .models import CacheInvalidation
+
+        try:
+            rows = CacheInvalidation.objects.bulk_create(
+                [CacheInvalidation(endpoint=endpoint, language=language) for endpoint, language in pairs]
+            )
+        except Exception as e:
+            logger.warning(f"Error recording cache invalidation: {e}")
+            return
+        if self.polling:
+            with self._lock:
+                self._own_ids.update(row.pk for row in rows)
+
+    def poll(self) -> int:
+        """Apply bumps recorded by other processes since the last poll."""
+        from .models import CacheInvalidation
+
+        if self.last_id is None:
+            self.last_id = CacheInvalidation.objects.order_by('-id').values_list('id', flat=True).first() or 0
+            return 0
+        rows = list(
+            CacheInvalidation.objects.filter(id__gt=self.last_id).order_by('id').values_list('id', 'endpoint', 'language')
+        )
+        if not rows:
+            return 0
+        self.last_id = rows[-1][0]
+        with self._lock:
+            pairs = {(endpoint, language) for pk, endpoint, language in rows if pk not in self._own_ids}
+            self._own_ids.difference_update(pk for pk, _, _ in rows)
+        if pairs:
+            _apply(pairs, record=False)
+        return len(pairs)
+
+    def prune(self):
+        from .models import CacheInvalidation
+
+        CacheInvalidation.objects.filter(created_at__lt=timezone.now() - self.RETENTION).delete()
+
+    def run(self, interval: float):
+        while True:
+            try:
+                self.poll()
+                if time.monotonic() - self._last_prune > 3600:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception as e:
+                logger.warning(f"Error polling cache invalidations: {e}")
+            finally:
+                connections.close_all()
+            time.sleep(interval)
+
+
+invalidation_log = InvalidationLog()
+
+
+def start_sync():
+    """Apply bumps made by other processes, when counters are process-local."""
+    interval = settings.INVALIDATION_SYNC_INTERVAL
+    if not interval or not is_process_local() or invalidation_log.polling:
+        return
+    invalidation_log.polling = True
+    thread = threading.Thread(
+        target=invalidation_log.run, args=(interval,), name="invalidation-sync", daemon=True
+    )
+    thread.start()
+
+
+@contextmanager
+def batch():
+    """Coalesce all bumps inside the block into a single counter update."""
+    if getattr(_local, "pending", None) is not None:
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+    finally:
+        pairs, _local.pending = _local.pending, None
+        if pairs:
+            transaction.on_commit(lambda: _apply(pairs))
+
+
+def _dependencies(model):
+    return REGISTRY.get(model._meta.label, ())
+
+
+def scope_fields(model):
+    fields = set()
+    for dependency in _dependencies(model):
+        fields.update(dependency.fields)
+    return sorted(fields)
+
+
+def invalidate_row(model, row):
+    """Bump every endpoint that a model row (instance or namespace) feeds."""
+    for dependency in _dependencies(model):
+        language = dependency.scope(row)
+        if language:
+            bump(dependency.endpoint, language)
+
+
+class Row:
+    """Attribute access over a values() dict, for scope functions."""
+
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+
+class InvalidatingQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk write paths, which do not send model signals,
+    still invalidate the cached endpoints that depend on the model.
+    """
+
+    def _affected_rows(self):
+        fields = scope_fields(self.model)
+        if not fields:
+            return [{}] if _dependencies(self.model) else []
+        return list(self.values(*fields).order_by().distinct())
+
+    def update(self, **kwargs):
+        if getattr(_local, "suppress", False) or not _dependencies(self.model):
+            return super().update(**kwargs)
+
+        with batch():
+            rows = self._affected_rows()
+            count = super().update(**kwargs)
+            if count:
+                for row in rows:
+                    invalidate_row(self.model, Row(row))
+                    changed = {key: value for key, value in kwargs.items() if key in row}
+                    if any(hasattr(value, "resolve_expression") for value in changed.values()):
+                        # New values are computed in the database
+                        for dependency in _dependencies(self.model):
+                            bump(dependency.endpoint)
+                    elif changed:
+                        invalidate_row(self.model, Row({**row, **changed}))
+        return count
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        with batch():
+            for obj in objs:
+                invalidate_row(self.model, obj)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with batch():
+            if set(fields) & set(scope_fields(self.model)):
+                pks = [obj.pk for obj in objs]
+                for row in self.filter(pk__in=pks)._affected_rows():
+                    invalidate_row(self.model, Row(row))
+            # bulk_update() is built on update(), rows are handled here
+            _local.suppress = True
+            try:
+                count = super().bulk_update(objs, fields, *args, **kwargs)
+            finally:
+                _local.suppress = False
+            for obj in objs:
+                invalidate_row(self.model, obj)
+        return count
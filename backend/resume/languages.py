@@ -0,0 +1,51 @@
+"""
+Site languages.
+
+Requests name a language in ?lang= or in the request body. Everything
+kept per language (snapshots, generation counters, AI context, answer
+cache, retrievers) must only ever see codes from the site_languages
+setting, so views resolve the requested language before touching any of
+it. The codes are memoized per process under the settings generation.
+"""
+import json
+import logging
+from typing import List, Tuple
+
+from . import invalidation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = ["en"]
+
+_memo = (None, None)
+
+
+def get_site_language_codes() -> List[str]:
+    """Language codes from the site_languages setting."""
+    global _memo
+    generation = invalidation.get_generation(invalidation.SETTINGS, invalidation.ALL_LANGUAGES)
+    if _memo[0] == generation:
+        return _memo[1]
+
+    from .models import Setting
+
+    value = Setting.objects.filter(name='site_languages').values_list('value', flat=True).first()
+    codes = DEFAULT_LANGUAGES
+    if value:
+        try:
+            codes = [lang['code'] for lang in json.loads(value)] or DEFAULT_LANGUAGES
+        except (json.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Invalid site_languages setting, using the defaults")
+    _memo = (generation, codes)
+    return codes
+
+
+def resolve_language(lang) -> Tuple[str, List[str]]:
+    """
+    Validate requested language against the site_languages setting.
+    Returns (lang, valid_langs), falling back to the first site language.
+    """
+    valid_langs = get_site_language_codes()
+    if lang not in valid_langs:
+        lang = valid_langs[0]
+    return lang, valid_langs
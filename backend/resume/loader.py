@@ -0,0 +1,63 @@
+"""
+Data access for the resume payload.
+
+All language-scoped content is fetched in a fixed number of queries, one
+per table, whatever the number of site languages or rows. Counts are
+taken from the fetched rows instead of separate COUNT queries. Content
+rows are projected straight into their serialized form (see
+serializers.RowSerializer).
+
+QUERY_BUDGET is the number of queries load_resume_content() makes once
+the resumes of all site languages exist; tests assert against it.
+"""
+from dataclasses import dataclass
+from typing import Dict, List
+
+from .models import Resume, Language, Skill, Experience, Education, Certificate, Project, ContactInfo
+from .serializers import (
+    language_rows, skill_rows, experience_rows, education_rows,
+    certificate_rows, project_rows, contact_info_rows
+)
+
+# One query for the resumes of all site languages and one per content table
+QUERY_BUDGET = 8
+
+
+@dataclass
+class ResumeContent:
+    resumes: Dict[str, Resume]
+    # Serialized rows
+    languages: List[dict]
+    skills: List[dict]
+    experiences: List[dict]
+    education: List[dict]
+    certificates: List[dict]
+    projects: List[dict]
+    contact_info: List[dict]
+
+
+def load_resumes(valid_langs) -> Dict[str, Resume]:
+    """Resumes for all site languages, in site language order."""
+    found = {resume.language: resume for resume in Resume.objects.filter(language__in=valid_langs)}
+    resumes = {}
+    for lang_code in valid_langs:
+        # Missing resumes are created with defaults, as Resume.load() does
+        resumes[lang_code] = found.get(lang_code) or Resume.load(lang_code)
+    return resumes
+
+
+def load_resume_content(lang, valid_langs) -> ResumeContent:
+    """Fetch everything the resume payload needs for a validated language."""
+    return ResumeContent(
+        resumes=load_resumes(valid_langs),
+        languages=language_rows.serialize(Language.objects.filter(language=lang)),
+        skills=skill_rows.serialize(
+            Skill.objects.filter(language=lang).order_by("category_name_key", "order", "name")
+        ),
+        experiences=experience_rows.serialize(Experience.objects.filter(language=lang)),
+        education=education_rows.serialize(Education.objects.filter(language=lang)),
+        certificates=certificate_rows.serialize(Certificate.objects.filter(language=lang)),
+        projects=project_rows.serialize(Project.objects.filter(language=lang)),
+        contact_info=contact_info_rows.serialize(ContactInfo.objects.filter(language=lang).order_by("order")),
+    )
+
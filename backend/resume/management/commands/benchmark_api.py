@@ -0,0 +1,264 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+from ai.models import AIChatLog
+from resume.invalidation import get_cache
+from resume.models import Resume, Experience, Project, Skill, Translation, Setting, Visit
+from resume.visits import get_visit_buffer
+
+PERCENTILES = [50, 90, 99]
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: str
+    # Request body for POST scenarios, given the iteration number
+    body: Optional[Callable[[int], dict]] = None
+    # Clear cached payloads before every request
+    cold: bool = False
+
+
+SCENARIOS = [
+    Scenario('resume', '/api/resume/?lang=en'),
+    Scenario('resume_cold', '/api/resume/?lang=en', cold=True),
+    Scenario('settings', '/api/settings/'),
+    Scenario('translations', '/api/translations/?lang=en'),
+    Scenario('bootstrap', '/api/bootstrap/?lang=en'),
+    # A new question every time, so the answer cache never hits
+    Scenario('ai_chat', '/api/ai/chat/', body=lambda i: {
+        'message': f'What did you build with {uuid.uuid4().hex}?', 'language': 'en',
+    }),
+    Scenario('ai_chat_cached', '/api/ai/chat/', body=lambda i: {
+        'message': 'What is your experience with Python?', 'language': 'en',
+    }),
+    # Pages outside /api/ go through the visit tracking middleware
+    Scenario('visit_middleware', '/'),
+]
+
+COUNTED_MODELS = [Resume, Experience, Project, Skill, Translation, Visit, AIChatLog]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+@dataclass
+class Result:
+    requests: int = 0
+    errors: int = 0
+    latencies: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    alloc_peaks: list = field(default_factory=list)
+
+    def as_dict(self):
+        report = {'requests': self.requests, 'errors': self.errors}
+        if self.latencies:
+            ms = [value * 1000 for value in self.latencies]
+            report['latency_ms'] = {
+                'mean': round(statistics.mean(ms), 3),
+                **{f'p{pct}': round(percentile(ms, pct), 3) for pct in PERCENTILES},
+                'max': round(max(ms), 3),
+            }
+            report['queries'] = {'mean': round(statistics.mean(self.queries), 2), 'max': max(self.queries)}
+        if self.alloc_peaks:
+            report['alloc_peak_kib'] = {
+                'mean': round(statistics.mean(self.alloc_peaks) / 1024, 1),
+                'max': round(max(self.alloc_peaks) / 1024, 1),
+            }
+        return report
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the public API endpoints against freshly seeded databases of several sizes "
+        "and write a JSON report"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='0,50',
+            help='Comma-separated seed_data --scale values, one benchmark database each (default: 0,50)'
+        )
+        parser.add_argument('--languages', type=int, default=0, help='Synthetic languages per dataset')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests before timing')
+        parser.add_argument(
+            '--alloc-iterations', type=int, default=20,
+            help='Requests per scenario traced for allocations, separately from timing (0 to skip)'
+        )
+        parser.add_argument('--model-latency', type=float, default=0.0, help='Fake model latency in ms')
+        parser.add_argument('--scenario', action='append', help='Only run these scenarios (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Earlier JSON report to print changes against')
+
+    def handle(self, *args, **options):
+        try:
+            scales = [int(value) for value in options['scales'].split(',') if value.strip()]
+        except ValueError:
+            raise CommandError("--scales must be comma-separated integers")
+        scenarios = SCENARIOS
+        if options['scenario']:
+            unknown = set(options['scenario']) - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in options['scenario']]
+
+        report = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'model_latency_ms': options['model_latency'],
+            },
+            'datasets': [],
+        }
+
+        setup_test_environment()
+        try:
+            for scale in scales:
+                report['datasets'].append(self.run_dataset(scale, scenarios, options))
+        finally:
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.write_comparison(json.load(f), report)
+
+    def run_dataset(self, scale, scenarios, options):
+        """Seed a throwaway database and run every scenario against it."""
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with open(os.devnull, 'w') as devnull:
+                call_command('seed_data', scale=scale, languages=options['languages'], stdout=devnull)
+            # Never reach the real API
+            Setting.objects.update_or_create(name='ai_provider', defaults={'value': 'fake'})
+            Setting.objects.update_or_create(name='ai_fake_options', defaults={'value': json.dumps({
+                'latency_ms': options['model_latency'], 'tokens_per_second': 0, 'seed': 0,
+            })})
+            get_cache().clear()
+
+            rows = {model.__name__: model.objects.count() for model in COUNTED_MODELS}
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Dataset scale={scale} on {connection.vendor}: "
+                + ", ".join(f"{count} {name}" for name, count in rows.items())
+            ))
+            self.stdout.write(
+                f"  {'scenario':<18}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}{'errors':>8}"
+            )
+
+            results = {}
+            for scenario in scenarios:
+                result = self.run_scenario(scenario, options)
+                results[scenario.name] = result.as_dict()
+                self.write_result(scenario.name, results[scenario.name])
+            return {'scale': scale, 'rows': rows, 'scenarios': results}
+        finally:
+            # Write buffered visits before their database goes away
+            get_visit_buffer().flush()
+            get_cache().clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run_scenario(self, scenario, options):
+        client = Client()
+        result = Result()
+
+        def send(i):
+            # Cache clearing for cold scenarios is not part of the measurement
+            if scenario.cold:
+                get_cache().clear()
+            if scenario.body:
+                body = scenario.body(i)
+                return lambda: client.post(scenario.path, body, content_type='application/json')
+            return lambda: client.get(scenario.path)
+
+        for i in range(options['warmup']):
+            send(i)()
+
+        for i in range(options['iterations']):
+            request = send(i)
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request()
+                elapsed = time.perf_counter() - start
+            result.requests += 1
+            result.errors += response.status_code >= 400
+            result.latencies.append(elapsed)
+            result.queries.append(len(queries))
+
+        if options['alloc_iterations'] > 0:
+            tracemalloc.start()
+            try:
+                for i in range(options['alloc_iterations']):
+                    request = send(i)
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    request()
+                    result.alloc_peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            finally:
+                tracemalloc.stop()
+        return result
+
+    def write_result(self, name, result):
+        latency = result.get('latency_ms', {})
+        alloc = result.get('alloc_peak_kib', {})
+        self.stdout.write(
+            f"  {name:<18}{latency.get('p50', 0):>9.2f}{latency.get('p90', 0):>9.2f}{latency.get('p99', 0):>9.2f}"
+            f"{result.get('queries', {}).get('mean', 0):>9.1f}{alloc.get('mean', 0):>10.1f}{result['errors']:>8}"
+        )
+
+    def write_comparison(self, baseline, report):
+        """p50 latency and query changes per dataset and scenario."""
+        previous = {dataset['scale']: dataset['scenarios'] for dataset in baseline.get('datasets', [])}
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Compared with {baseline.get('meta', {}).get('revision') or 'baseline'}"
+        ))
+        for dataset in report['datasets']:
+            for name, result in dataset['scenarios'].items():
+                before = previous.get(dataset['scale'], {}).get(name)
+                if not before or 'latency_ms' not in before or 'latency_ms' not in result:
+                    continue
+                old_p50, new_p50 = before['latency_ms']['p50'], result['latency_ms']['p50']
+                change = (new_p50 - old_p50) / old_p50 * 100 if old_p50 else 0.0
+                line = (
+                    f"  scale={dataset['scale']:<6}{name:<18}p50 {old_p50:.2f} -> {new_p50:.2f} ms ({change:+.1f}%)"
+                    f"  queries {before['queries']['mean']} -> {result['queries']['mean']}"
+                )
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(line))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from resume.serializers import (
+    language_rows, skill_rows, experience_rows, education_rows,
+    certificate_rows, project_rows, contact_info_rows
+)
+
+
+class Command(BaseCommand):
+    help = "Compare per-row serialization cost of ModelSerializers and the values() fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lang', default='en', help='Language of the rows to serialize')
+        parser.add_argument('--iterations', type=int, default=200, help='Runs per serializer')
+
+    def handle(self, *args, **options):
+        lang = options['lang']
+        iterations = max(options['iterations'], 1)
+
+        self.stdout.write(f"{'model':<14}{'rows':>6}{'serializer us/row':>20}{'values() us/row':>18}{'speedup':>10}")
+        for rows in [language_rows, skill_rows, experience_rows, education_rows,
+                     certificate_rows, project_rows, contact_info_rows]:
+            queryset = rows.model.objects.filter(language=lang)
+            count = queryset.count()
+            if not count:
+                self.stdout.write(f"{rows.model.__name__:<14}{0:>6}  (no rows, skipped)")
+                continue
+
+            # Both paths include fetching the rows, as get_resume does
+            slow = self.measure(lambda: rows.serializer_class(queryset.all(), many=True).data, iterations)
+            fast = self.measure(lambda: rows.serialize(queryset.all()), iterations)
+            slow_per_row = slow / (iterations * count) * 1e6
+            fast_per_row = fast / (iterations * count) * 1e6
+            self.stdout.write(
+                f"{rows.model.__name__:<14}{count:>6}{slow_per_row:>20.1f}{fast_per_row:>18.1f}"
+                f"{slow_per_row / fast_per_row:>9.1f}x"
+            )
+
+    @staticmethod
+    def measure(func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return time.perf_counter() - start
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from resume.duplication import ModelReport, choose_source_language, duplicate_language, existing_languages
+
+
+class Command(BaseCommand):
+    help = "Copy resume content and translations from one language into others"
+
+    def add_arguments(self, parser):
+        parser.add_argument('languages', nargs='+', help='Target language codes')
+        parser.add_argument('--source', help="Language to copy from (default: 'en', then the first one with content)")
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be copied without writing')
+
+    def handle(self, *args, **options):
+        source = options['source'] or choose_source_language(existing_languages())
+        if not source:
+            raise CommandError("No source language found for duplication")
+
+        for target in options['languages']:
+            if target == source:
+                self.stdout.write(self.style.WARNING(f"Skipping '{target}': it is the source language"))
+                continue
+
+            self.stdout.write(f"{'Checking' if options['dry_run'] else 'Duplicating'} '{source}' -> '{target}'...")
+            report = duplicate_language(source, target, dry_run=options['dry_run'], progress=self.write_progress)
+            verb = "Would create" if report.dry_run else "Created"
+            self.stdout.write(self.style.SUCCESS(
+                f"{verb} {report.created} rows for '{target}' ({report.skipped} already present)"
+            ))
+
+    def write_progress(self, report: ModelReport):
+        self.stdout.write(
+            f"  {report.model:<12} {report.created:>6} new  {report.skipped:>6} present  of {report.source}"
+        )
@@ -1,18 +1,86 @@
+from datetime import timedelta
+import json
+import random
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Max, Value
+from ai.models import AIChatLog
+from resume import invalidation
 from resume.models import (
     Setting, Translation, Resume, Experience, Education,
-    Certificate, Project, Language, ContactInfo, Skill
+    Certificate, Project, Language, ContactInfo, Skill, Visit
 )
-import json
 
 User = get_user_model()
 
+BATCH_SIZE = 1000
+
+SYNTHETIC_PAGES = ['/', '/#about', '/#experience', '/#skills', '/#projects', '/#contact']
+SYNTHETIC_QUESTIONS = [
+    'What is your experience with Python?',
+    'Which projects have you built with React?',
+    'Do you have team lead experience?',
+    'What databases have you worked with?',
+    'How can I contact you?',
+]
+
+
+def create_missing(model, rows, key_fields):
+    """Bulk insert the rows whose key is not in the table yet; returns how many were created."""
+    existing = set(model.objects.values_list(*key_fields))
+    missing = {}
+    for row in rows:
+        missing.setdefault(tuple(row[name] for name in key_fields), row)
+    objs = [model(**row) for key, row in missing.items() if key not in existing]
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    return len(objs)
+
+
+def spread_timestamps(model, after_pk, fields, days):
+    """
+    Move the auto_now timestamps of rows inserted after `after_pk` back by
+    up to `days` days, scattered by id, in one UPDATE.
+    """
+    age = ExpressionWrapper(
+        Value(timedelta(seconds=1)) * ((F('id') * 7919) % (days * 86400)),
+        output_field=DurationField(),
+    )
+    model.objects.filter(pk__gt=after_pk).update(**{name: F(fields[0]) - age for name in fields})
+
+
+def last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
 
 class Command(BaseCommand):
     help = 'Seed database with John Doe test data'
-    
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=0,
+            help='Also generate this many synthetic experiences, projects, skills and translations per language'
+        )
+        parser.add_argument(
+            '--languages', type=int, default=0,
+            help='Number of synthetic site languages to add when scaling (e.g. 10)'
+        )
+        parser.add_argument('--visits', type=int, help='Synthetic visits to generate (default: 100 x scale)')
+        parser.add_argument('--chat-logs', type=int, help='Synthetic AI chat logs to generate (default: 20 x scale)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for synthetic data')
+
     def handle(self, *args, **options):
+        start = time.perf_counter()
+        # One transaction and one cache invalidation for the whole seed
+        with transaction.atomic(), invalidation.batch():
+            self.seed()
+            if options['scale'] > 0:
+                self.create_synthetic_data(options)
+        self.stdout.write(f'  Took {time.perf_counter() - start:.1f}s')
+
+    def seed(self):
         # Check if Resume table already has data - skip seeding if not empty
         if Resume.objects.exists():
             self.stdout.write(self.style.WARNING('⏭️  Database already has resume data. Skipping seed.'))
@@ -33,7 +101,96 @@ class Command(BaseCommand):
         self.create_resume_data()
         
         self.stdout.write(self.style.SUCCESS('✅ Database seeded successfully!'))
-    
+
+    def create_synthetic_data(self, options):
+        """
+        Load-testing volume on top of the seed: synthetic site languages and
+        `scale` rows per content model and language, plus visit and chat
+        history. Adds rows on every run.
+        """
+        scale = options['scale']
+        rng = random.Random(options['seed'])
+        self.stdout.write(f'Generating synthetic data (scale {scale})...')
+
+        setting, _ = Setting.objects.get_or_create(name='site_languages', defaults={'value': '[]'})
+        site_languages = json.loads(setting.value or '[]')
+        known = {lang['code'] for lang in site_languages}
+        for i in range(1, options['languages'] + 1):
+            code = f'x{i:02d}'
+            if code not in known:
+                site_languages.append({'code': code, 'name': f'Synthetic {i}', 'flag': ''})
+        # update() does not send post_save, so the languages are not
+        # duplicated from English on top of the synthetic rows below
+        Setting.objects.filter(pk=setting.pk).update(value=json.dumps(site_languages, ensure_ascii=False))
+        codes = [lang['code'] for lang in site_languages]
+
+        create_missing(Resume, [
+            {
+                'language': code, 'firstname': 'John', 'lastname': 'Doe',
+                'resume_title': f'Synthetic resume ({code})',
+                'resume_description': 'Synthetic description for load testing.',
+                'about_me': 'Synthetic about section for load testing.',
+            }
+            for code in codes
+        ], ['language'])
+
+        # Continue numbering after earlier runs
+        offset = Project.objects.filter(code__startswith='synthetic-').count() // max(len(codes), 1)
+        counts = {}
+        for model, build in [
+            (Experience, lambda code, n: Experience(
+                company=f'Company {n}', position='Software Engineer',
+                start_date=f'Jan {2000 + n % 20}', end_date=f'Dec {2001 + n % 20}',
+                description='Synthetic experience entry. ' * 10, language=code, order=n * 10,
+            )),
+            (Project, lambda code, n: Project(
+                code=f'synthetic-{n}', title=f'Project {n}', description='Synthetic project entry. ' * 10,
+                technologies=rng.sample(['Python', 'Django', 'React', 'Next.js', 'PostgreSQL', 'Redis'], 3),
+                language=code, order=n * 10,
+            )),
+            (Skill, lambda code, n: Skill(
+                name=f'Skill {n}', category_name=f'Category {n % 5}', category_name_key=f'category_{n % 5}',
+                language=code, order=n * 10,
+            )),
+            (Translation, lambda code, n: Translation(
+                key=f'synthetic_{n}', language=code, value=f'Synthetic text {n} ({code})',
+            )),
+        ]:
+            objs = [build(code, n) for code in codes for n in range(offset, offset + scale)]
+            model.objects.bulk_create(objs, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            counts[model._meta.verbose_name_plural] = len(objs)
+
+        after_pk = last_pk(Visit)
+        visits = [
+            Visit(
+                session_id=f'synthetic-{rng.getrandbits(64):016x}',
+                ip_address=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                user_agent='Mozilla/5.0 (synthetic)',
+                page=rng.choice(SYNTHETIC_PAGES),
+            )
+            for _ in range(scale * 100 if options['visits'] is None else options['visits'])
+        ]
+        Visit.objects.bulk_create(visits, batch_size=BATCH_SIZE)
+        spread_timestamps(Visit, after_pk, ['first_visit', 'last_visit'], days=90)
+        counts['visits'] = len(visits)
+
+        after_pk = last_pk(AIChatLog)
+        chat_logs = [
+            AIChatLog(
+                session_id=f'synthetic-{rng.getrandbits(32):08x}',
+                user_message=rng.choice(SYNTHETIC_QUESTIONS),
+                ai_response='Synthetic answer for load testing. ' * 5,
+                language=rng.choice(codes),
+            )
+            for _ in range(scale * 20 if options['chat_logs'] is None else options['chat_logs'])
+        ]
+        AIChatLog.objects.bulk_create(chat_logs, batch_size=BATCH_SIZE)
+        spread_timestamps(AIChatLog, after_pk, ['timestamp'], days=90)
+        counts['AI chat logs'] = len(chat_logs)
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'✅ Generated {summary} across {len(codes)} languages'))
+
     def create_superuser(self):
         """Create default admin user."""
         if not User.objects.filter(username='admin').exists():
@@ -73,13 +230,14 @@ class Command(BaseCommand):
                 'value': 'en',
                 'description': 'Default language code'
             },
+            {
+                'name': 'api_cache_control',
+                'value': 'no-cache',
+                'description': 'Cache-Control header for the resume, settings and translations APIs (e.g., public, max-age=60)'
+            },
         ]
         
-        created_count = 0
-        for data in settings_data:
-            obj, created = Setting.objects.get_or_create(name=data['name'], defaults=data)
-            if created:
-                created_count += 1
+        created_count = create_missing(Setting, settings_data, ['name'])
         
         self.stdout.write(f'  ✓ Created/updated {len(settings_data)} settings ({created_count} new)')
     
@@ -170,23 +328,11 @@ class Command(BaseCommand):
             {'key': 'month_12_short', 'en': 'dec', 'ru': 'дек', 'zh': '12月'},
         ]
         
-        created_count = 0
-        for t in translations:
-            key = t['key']
-            _, created_en = Translation.objects.get_or_create(
-                key=key, language='en',
-                defaults={'value': t['en']}
-            )
-            _, created_ru = Translation.objects.get_or_create(
-                key=key, language='ru',
-                defaults={'value': t['ru']}
-            )
-            _, created_zh = Translation.objects.get_or_create(
-                key=key, language='zh',
-                defaults={'value': t['zh']}
-            )
-            if created_en or created_ru or created_zh:
-                created_count += 1
+        created_count = create_missing(Translation, [
+            {'key': t['key'], 'language': lang, 'value': t[lang]}
+            for t in translations
+            for lang in ['en', 'ru', 'zh']
+        ], ['key', 'language'])
         
         self.stdout.write(f'  ✓ Created/updated {len(translations) * 3} translations ({created_count} new)')
     
@@ -194,42 +340,36 @@ class Command(BaseCommand):
         """Create John Doe test resume."""
         
         # Resume EN
-        resume_en, created_en = Resume.objects.get_or_create(
-            language='en',
-            defaults={
-                'firstname': 'John',
-                'lastname': 'Doe',
-                'resume_title': 'Senior Full-Stack Developer & Team Lead',
-                'resume_description': 'Building modern web applications with React, Node.js, and Python. Leading development teams and architecting scalable solutions. Passionate about mentoring developers and driving technical excellence.',
-                'about_me': 'Experienced full-stack developer with 5+ years building scalable web applications. Passionate about clean code and modern technologies.',
-            }
-        )
+        resume_en = {
+            'language': 'en',
+            'firstname': 'John',
+            'lastname': 'Doe',
+            'resume_title': 'Senior Full-Stack Developer & Team Lead',
+            'resume_description': 'Building modern web applications with React, Node.js, and Python. Leading development teams and architecting scalable solutions. Passionate about mentoring developers and driving technical excellence.',
+            'about_me': 'Experienced full-stack developer with 5+ years building scalable web applications. Passionate about clean code and modern technologies.',
+        }
         
         # Resume RU
-        resume_ru, created_ru = Resume.objects.get_or_create(
-            language='ru',
-            defaults={
-                'firstname': 'Джон',
-                'lastname': 'Доу',
-                'resume_title': 'Тим Лид, Сеньор Фуллстек Разработчик',
-                'resume_description': 'Создание современных веб-приложений на React, Node.js и Python. Руководство командами разработки и проектирование масштабируемых решений. Увлечен менторством разработчиков и достижением технического совершенства.',
-                'about_me': 'Опытный фулстек-разработчик с опытом 5+ лет создания масштабируемых веб-приложений. Увлечен чистым кодом и современными технологиями.',
-            }
-        )
+        resume_ru = {
+            'language': 'ru',
+            'firstname': 'Джон',
+            'lastname': 'Доу',
+            'resume_title': 'Тим Лид, Сеньор Фуллстек Разработчик',
+            'resume_description': 'Создание современных веб-приложений на React, Node.js и Python. Руководство командами разработки и проектирование масштабируемых решений. Увлечен менторством разработчиков и достижением технического совершенства.',
+            'about_me': 'Опытный фулстек-разработчик с опытом 5+ лет создания масштабируемых веб-приложений. Увлечен чистым кодом и современными технологиями.',
+        }
         
         # Resume ZH
-        resume_zh, created_zh = Resume.objects.get_or_create(
-            language='zh',
-            defaults={
-                'firstname': '张',
-                'lastname': '伟',
-                'resume_title': '高级全栈开发工程师和团队负责人',
-                'resume_description': '使用React、Node.js和Python构建现代Web应用程序。领导开发团队并设计可扩展解决方案。热衷于指导开发人员并推动技术卓越。',
-                'about_me': '经验丰富的全栈开发工程师，拥有5年以上构建可扩展Web应用程序的经验。热衷于编写干净的代码和使用现代技术。',
-            }
-        )
-        
-        if created_en or created_ru or created_zh:
+        resume_zh = {
+            'language': 'zh',
+            'firstname': '张',
+            'lastname': '伟',
+            'resume_title': '高级全栈开发工程师和团队负责人',
+            'resume_description': '使用React、Node.js和Python构建现代Web应用程序。领导开发团队并设计可扩展解决方案。热衷于指导开发人员并推动技术卓越。',
+            'about_me': '经验丰富的全栈开发工程师，拥有5年以上构建可扩展Web应用程序的经验。热衷于编写干净的代码和使用现代技术。',
+        }
+        
+        if create_missing(Resume, [resume_en, resume_ru, resume_zh], ['language']):
             self.stdout.write('  ✓ Created resume entries')
         
         # Experience
@@ -323,15 +463,9 @@ class Command(BaseCommand):
             },
         ]
         
-        created_exp = 0
-        for exp_data in experiences_en + experiences_ru + experiences_zh:
-            _, created = Experience.objects.get_or_create(
-                company=exp_data['company'],
-                language=exp_data['language'],
-                defaults=exp_data
-            )
-            if created:
-                created_exp += 1
+        created_exp = create_missing(
+            Experience, experiences_en + experiences_ru + experiences_zh, ['company', 'language']
+        )
         
         if created_exp > 0:
             self.stdout.write(f'  ✓ Created {created_exp} experience entries')
@@ -400,15 +534,9 @@ class Command(BaseCommand):
             },
         ]
         
-        created_edu = 0
-        for edu_data in educations_en + educations_ru + educations_zh:
-            _, created = Education.objects.get_or_create(
-                institution=edu_data['institution'],
-                language=edu_data['language'],
-                defaults=edu_data
-            )
-            if created:
-                created_edu += 1
+        created_edu = create_missing(
+            Education, educations_en + educations_ru + educations_zh, ['institution', 'language']
+        )
         
         if created_edu > 0:
             self.stdout.write(f'  ✓ Created {created_edu} education entries')
@@ -429,15 +557,9 @@ class Command(BaseCommand):
             {'name': 'Google Cloud专业认证', 'year': '2022', 'language': 'zh', 'order': 20},
         ]
         
-        created_cert = 0
-        for cert_data in certificates_en + certificates_ru + certificates_zh:
-            _, created = Certificate.objects.get_or_create(
-                name=cert_data['name'],
-                language=cert_data['language'],
-                defaults=cert_data
-            )
-            if created:
-                created_cert += 1
+        created_cert = create_missing(
+            Certificate, certificates_en + certificates_ru + certificates_zh, ['name', 'language']
+        )
         
         if created_cert > 0:
             self.stdout.write(f'  ✓ Created {created_cert} certificate entries')
@@ -560,15 +682,9 @@ class Command(BaseCommand):
             },
         ]
         
-        created_proj = 0
-        for proj_data in projects_en + projects_ru + projects_zh:
-            _, created = Project.objects.get_or_create(
-                code=proj_data['code'],
-                language=proj_data['language'],
-                defaults=proj_data
-            )
-            if created:
-                created_proj += 1
+        created_proj = create_missing(
+            Project, projects_en + projects_ru + projects_zh, ['code', 'language']
+        )
         
         if created_proj > 0:
             self.stdout.write(f'  ✓ Created {created_proj} project entries')
@@ -646,16 +762,9 @@ class Command(BaseCommand):
             {'name': 'CI/CD', 'category_name': 'DevOps', 'category_name_key': 'devops', 'category_color': 'from-orange-500 to-red-500', 'language': 'zh', 'order': 40},
         ]
 
-        created_skill = 0
-        for skill_data in skills_en + skills_ru + skills_zh:
-            _, created = Skill.objects.get_or_create(
-                name=skill_data['name'],
-                language=skill_data['language'],
-                category_name_key=skill_data['category_name_key'],
-                defaults=skill_data
-            )
-            if created:
-                created_skill += 1
+        created_skill = create_missing(
+            Skill, skills_en + skills_ru + skills_zh, ['name', 'language', 'category_name_key']
+        )
 
         if created_skill > 0:
             self.stdout.write(f'  ✓ Created {created_skill} skill entries')
@@ -682,15 +791,9 @@ class Command(BaseCommand):
             {'name': '中文', 'level': 'A2 初级', 'proficiency': 40, 'language': 'zh', 'order': 40},
         ]
         
-        created_lang = 0
-        for lang_data in languages_en + languages_ru + languages_zh:
-            _, created = Language.objects.get_or_create(
-                name=lang_data['name'],
-                language=lang_data['language'],
-                defaults=lang_data
-            )
-            if created:
-                created_lang += 1
+        created_lang = create_missing(
+            Language, languages_en + languages_ru + languages_zh, ['name', 'language']
+        )
         
         if created_lang > 0:
             self.stdout.write(f'  ✓ Created {created_lang} language entries')
@@ -714,15 +817,9 @@ class Command(BaseCommand):
             {'type': 'linkedin', 'label': 'LinkedIn', 'value': 'linkedin.com', 'href': 'https://www.linkedin.com/', 'language': 'zh', 'order': 30},
         ]
         
-        created_contact = 0
-        for contact_data in contacts_en + contacts_ru + contacts_zh:
-            _, created = ContactInfo.objects.get_or_create(
-                type=contact_data['type'],
-                language=contact_data['language'],
-                defaults=contact_data
-            )
-            if created:
-                created_contact += 1
+        created_contact = create_missing(
+            ContactInfo, contacts_en + contacts_ru + contacts_zh, ['type', 'language']
+        )
         
         if created_contact > 0:
             self.stdout.write(f'  ✓ Created {created_contact} contact info entries')
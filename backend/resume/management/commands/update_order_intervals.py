@@ -1,76 +1,66 @@
+import time
+from itertools import groupby
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from resume.invalidation import scope_fields
 from resume.models import Language, Skill, Experience, Education, Certificate, Project
 
+INTERVAL = 10
 
-class Command(BaseCommand):
-    help = "Update order values for all resume models with interval of 10"
+# Model, fields whose rows are numbered together within each language,
+# and the order the numbers follow
+RENUMBERED = [
+    (Language, [], ['order', 'id']),
+    (Skill, ['category_name_key'], ['order', 'id']),
+    (Experience, [], ['order', 'id']),
+    (Education, [], ['-order', '-year', 'id']),
+    (Certificate, [], ['order', 'id']),
+    (Project, [], ['order', 'id']),
+]
 
-    def handle(self, *args, **options):
-        self.stdout.write("Updating order intervals...")
 
-        languages_en = Language.objects.filter(language="en").order_by('order', 'id')
-        languages_ru = Language.objects.filter(language="ru").order_by('order', 'id')
-        updated = 0
-        for i, language in enumerate(languages_en, start=1):
-            language.order = i * 10
-            language.save()
-            updated += 1
-        for i, language in enumerate(languages_ru, start=1):
-            language.order = i * 10
-            language.save()
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} languages"))
+def renumber(model, group_by, ordering):
+    """
+    Set order to INTERVAL, 2 * INTERVAL, ... within each (language, *group_by)
+    partition. Rows are read in one query and only changed rows are written,
+    with one bulk_update in one transaction. Returns (rows, changed).
+    """
+    partition = ['language', *group_by]
+    columns = {'pk', 'order', *partition, *scope_fields(model), *(name.lstrip('-') for name in ordering)}
+    rows = model.objects.order_by(*partition, *ordering).values(*columns)
 
-        processed_categories = set()
-        skills = Skill.objects.all().order_by('category_name_key', 'language', 'order', 'id')
-        updated = 0
-        for skill in skills:
-            category_key = (skill.category_name_key, skill.language)
-            if category_key not in processed_categories:
-                category_skills = Skill.objects.filter(
-                    category_name_key=skill.category_name_key,
-                    language=skill.language
-                ).order_by('order', 'id')
-                
-                for i, s in enumerate(category_skills, start=1):
-                    s.order = i * 10
-                    s.save()
-                    updated += 1
-                
-                processed_categories.add(category_key)
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} skills"))
+    now = timezone.now()
+    changed = []
+    total = 0
+    for _, group in groupby(rows, key=lambda row: tuple(row[name] for name in partition)):
+        for i, row in enumerate(group, start=1):
+            total += 1
+            if row['order'] != i * INTERVAL:
+                # Carries the fields invalidation reads, only order is written
+                obj = model(**{name: row[name] for name in columns - {'id'}})
+                obj.order = i * INTERVAL
+                obj.updated_at = now
+                changed.append(obj)
 
-        experiences = Experience.objects.all().order_by('order', 'id')
-        updated = 0
-        for i, experience in enumerate(experiences, start=1):
-            experience.order = i * 10
-            experience.save()
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} experiences"))
+    with transaction.atomic():
+        model.objects.bulk_update(changed, ['order', 'updated_at'], batch_size=500)
+    return total, len(changed)
 
-        educations = Education.objects.all().order_by('-order', '-year', 'id')
-        updated = 0
-        for i, education in enumerate(educations, start=1):
-            education.order = i * 10
-            education.save()
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} educations"))
 
-        certificates = Certificate.objects.all().order_by('order', 'id')
-        updated = 0
-        for i, certificate in enumerate(certificates, start=1):
-            certificate.order = i * 10
-            certificate.save()
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} certificates"))
+class Command(BaseCommand):
+    help = "Update order values for all resume models with interval of 10"
 
-        projects = Project.objects.all().order_by('order', 'id')
-        updated = 0
-        for i, project in enumerate(projects, start=1):
-            project.order = i * 10
-            project.save()
-            updated += 1
-        self.stdout.write(self.style.SUCCESS(f"Updated {updated} projects"))
+    def handle(self, *args, **options):
+        self.stdout.write("Updating order intervals...")
 
-        self.stdout.write(self.style.SUCCESS("Successfully updated all order intervals!"))
+        for model, group_by, ordering in RENUMBERED:
+            start = time.perf_counter()
+            total, changed = renumber(model, group_by, ordering)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f"Updated {changed} of {total} {model._meta.verbose_name_plural} in {elapsed:.1f} ms"
+            ))
 
+        self.stdout.write(self.style.SUCCESS("Successfully updated all order intervals!"))
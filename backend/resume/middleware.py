@@ -1,54 +1,69 @@
 """
 Middleware for tracking website visits.
 Session-based tracking to avoid duplicate entries for page reloads.
+Visits are written in the background, see resume.visits.
 """
-from .models import Visit
-from django.utils import timezone
-import uuid
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from .visits import record_visit
 
 
 class VisitTrackingMiddleware:
     """Track page visits with session-based deduplication."""
-    
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
-    
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
     def __call__(self, request):
-        # Skip admin, static files, API endpoints, and favicon
-        if not request.path.startswith('/admin/') and \
-           not request.path.startswith('/static/') and \
-           not request.path.startswith('/_next/') and \
-           not request.path.startswith('/api/') and \
-           not request.path.endswith('/favicon.ico'):
-            
-            try:
-                # Get or create session ID
-                if not request.session.session_key:
-                    request.session.create()
-                
-                session_id = request.session.session_key
-                
-                # Try to find existing visit for this session
-                visit = Visit.objects.filter(session_id=session_id).first()
-                
-                if visit:
-                    # Update last_visit time (auto_now will handle this)
-                    visit.save(update_fields=['last_visit'])
-                else:
-                    # Create new visit record
-                    Visit.objects.create(
-                        session_id=session_id,
-                        ip_address=self.get_client_ip(request),
-                        user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
-                        referer=request.META.get('HTTP_REFERER', '')[:500] if request.META.get('HTTP_REFERER') else None,
-                        page=request.path
-                    )
-            except Exception as e:
-                # Don't break the request if tracking fails
-                print(f"Visit tracking error: {e}")
-        
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if self.should_track(request):
+            self.track(request)
+
         return self.get_response(request)
-    
+
+    async def __acall__(self, request):
+        if self.should_track(request):
+            await sync_to_async(self.track)(request)
+
+        return await self.get_response(request)
+
+    @staticmethod
+    def should_track(request):
+        # Skip admin, static files, API endpoints, metrics, and favicon
+        return not request.path.startswith('/admin/') and \
+            not request.path.startswith('/static/') and \
+            not request.path.startswith('/_next/') and \
+            not request.path.startswith('/api/') and \
+            not request.path.startswith('/metrics/') and \
+            not request.path.endswith('/favicon.ico')
+
+    def track(self, request):
+        try:
+            # Get or create session ID
+            if not request.session.session_key:
+                request.session.create()
+
+            session_id = request.session.session_key
+
+            # Queue the visit; a new one is created or last_visit updated later
+            record_visit(
+                session_id=session_id,
+                ip_address=self.get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500],
+                referer=request.META.get('HTTP_REFERER', '')[:500] if request.META.get('HTTP_REFERER') else None,
+                page=request.path
+            )
+        except Exception as e:
+            # Don't break the request if tracking fails
+            print(f"Visit tracking error: {e}")
+
     @staticmethod
     def get_client_ip(request):
         """Get real IP address, considering proxies."""
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .invalidation import InvalidatingQuerySet
+
 
 class Resume(models.Model):
     language = models.CharField(max_length=10, default="en", help_text="Language code (e.g., en, ru, zh)")
@@ -11,6 +13,8 @@ class Resume(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume"
         verbose_name = "Resume"
@@ -62,6 +66,8 @@ class Language(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_language"
         ordering = ["order", "name"]
@@ -82,6 +88,8 @@ class Skill(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_skill"
         ordering = ["category_name_key", "order", "name"]
@@ -103,6 +111,8 @@ class Experience(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_experience"
         ordering = ["order", "-start_date"]
@@ -124,6 +134,8 @@ class Education(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_education"
         ordering = ["order", "-year"]
@@ -142,6 +154,8 @@ class Certificate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_certificate"
         ordering = ["order", "name"]
@@ -163,6 +177,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_project"
         ordering = ["order"]
@@ -184,6 +200,8 @@ class ContactInfo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "resume_contact_info"
         ordering = ["order"]
@@ -211,6 +229,8 @@ class Setting(models.Model):
     value = models.TextField()
     description = models.TextField(blank=True, help_text="What this setting does")
     
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "setting"
         verbose_name = "Setting"
@@ -239,6 +259,8 @@ class Translation(models.Model):
         help_text="Translated text"
     )
     
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         unique_together = ['key', 'language']
         verbose_name = "Translation"
@@ -265,6 +287,8 @@ class Visit(models.Model):
     first_visit = models.DateTimeField(auto_now_add=True, db_index=True, help_text="First visit timestamp")
     last_visit = models.DateTimeField(auto_now=True, help_text="Last visit timestamp (updated on each request)")
     
+    objects = InvalidatingQuerySet.as_manager()
+
     class Meta:
         db_table = "visit"
         ordering = ['-last_visit']
@@ -280,3 +304,22 @@ class Visit(models.Model):
     def __str__(self):
         duration = (self.last_visit - self.first_visit).total_seconds() if self.last_visit and self.first_visit else 0
         return f"{self.ip_address} - {self.page} - {self.first_visit.strftime('%Y-%m-%d %H:%M')} ({int(duration)}s)"
+
+
+class CacheInvalidation(models.Model):
+    """
+    Endpoint generation bumps, for server processes whose cache is not
+    shared with the process that made the change (see resume.invalidation).
+    """
+
+    endpoint = models.CharField(max_length=50)
+    language = models.CharField(max_length=10)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "cache_invalidation"
+        verbose_name = "Cache invalidation"
+        verbose_name_plural = "Cache invalidations"
+
+    def __str__(self):
+        return f"{self.endpoint} ({self.language})"
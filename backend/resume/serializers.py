@@ -1,3 +1,4 @@
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
 from .models import Resume, Language, Skill, Experience, Education, Certificate, Project, ContactInfo
 
@@ -49,3 +50,38 @@ class ContactInfoSerializer(serializers.ModelSerializer):
         model = ContactInfo
         fields = ["id", "type", "label", "value", "href", "order"]
 
+
+
+class RowSerializer:
+    """
+    Read-only fast path for a flat ModelSerializer.
+
+    Rows are projected with values() over the serializer's field tuple, so
+    no model instances or serializer fields are built. Only serializers
+    whose fields are plain model columns can be compiled; their output is
+    the same as serializer_class(queryset, many=True).data.
+    """
+
+    def __init__(self, serializer_class):
+        meta = serializer_class.Meta
+        if serializer_class._declared_fields:
+            raise ImproperlyConfigured(f"{serializer_class.__name__} declares custom fields")
+        for name in meta.fields:
+            field = meta.model._meta.get_field(name)
+            if not field.concrete or field.is_relation:
+                raise ImproperlyConfigured(f"{serializer_class.__name__}.{name} is not a plain column")
+        self.serializer_class = serializer_class
+        self.model = meta.model
+        self.fields = tuple(meta.fields)
+
+    def serialize(self, queryset):
+        return list(queryset.values(*self.fields))
+
+
+language_rows = RowSerializer(LanguageSerializer)
+skill_rows = RowSerializer(SkillSerializer)
+experience_rows = RowSerializer(ExperienceSerializer)
+education_rows = RowSerializer(EducationSerializer)
+certificate_rows = RowSerializer(CertificateSerializer)
+project_rows = RowSerializer(ProjectSerializer)
+contact_info_rows = RowSerializer(ContactInfoSerializer)
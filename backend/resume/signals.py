@@ -1,14 +1,44 @@
 """
-Signals for handling language duplication when new languages are added.
+Signals for handling language duplication when new languages are added
+and for invalidating cached content when rows are saved or deleted.
 """
 import json
 import logging
-from django.db.models.signals import pre_save, post_save
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
+from . import invalidation
+
 logger = logging.getLogger(__name__)
 
 
+def invalidate_previous_row(sender, instance, raw=False, **kwargs):
+    """
+    Before an existing row is saved, invalidate what its stored values feed
+    when a field that selects the affected language is being changed.
+    """
+    fields = invalidation.scope_fields(sender)
+    if raw or instance.pk is None or not fields:
+        return
+    previous = sender._base_manager.filter(pk=instance.pk).values(*fields).first()
+    if previous and any(previous[field] != getattr(instance, field) for field in fields):
+        invalidation.invalidate_row(sender, invalidation.Row(previous))
+
+
+def invalidate_row(sender, instance, **kwargs):
+    """After a row is saved or deleted, invalidate every cache it feeds."""
+    invalidation.invalidate_row(sender, instance)
+
+
+for _label, _dependencies in invalidation.REGISTRY.items():
+    if not _dependencies:
+        continue
+    pre_save.connect(invalidate_previous_row, sender=_label, dispatch_uid=f'invalidate_pre_save_{_label}')
+    post_save.connect(invalidate_row, sender=_label, dispatch_uid=f'invalidate_save_{_label}')
+    post_delete.connect(invalidate_row, sender=_label, dispatch_uid=f'invalidate_delete_{_label}')
+
+
 @receiver(post_save, sender='resume.Setting')
 def duplicate_content_for_new_language(sender, instance, **kwargs):
     """
@@ -24,76 +54,27 @@ def duplicate_content_for_new_language(sender, instance, **kwargs):
     except (json.JSONDecodeError, KeyError, TypeError):
         return
 
-    # Import models here to avoid circular imports
-    from .models import (
-        Resume, Language, Skill, Experience, Education,
-        Certificate, Project, ContactInfo, Translation
+    # Import here to avoid circular imports
+    from .duplication import (
+        existing_languages, choose_source_language, duplicate_languages, start_duplication
     )
 
-    # Models that have language field and should be duplicated
-    models_to_duplicate = [
-        Resume, Language, Skill, Experience, Education,
-        Certificate, Project, ContactInfo, Translation
-    ]
-
-    # Find existing languages in the database
-    existing_langs = set()
-    for model in models_to_duplicate:
-        existing_langs.update(
-            model.objects.values_list('language', flat=True).distinct()
-        )
-
     # Find new languages that don't have content yet
+    existing_langs = existing_languages()
     new_langs_to_create = new_lang_codes - existing_langs
     if not new_langs_to_create:
         return
 
     # Choose source language (prefer 'en', then first available)
-    source_lang = 'en' if 'en' in existing_langs else (list(existing_langs)[0] if existing_langs else None)
+    source_lang = choose_source_language(existing_langs)
     if not source_lang:
         logger.warning("No source language found for duplication")
         return
 
     logger.info(f"Duplicating content from '{source_lang}' to new languages: {new_langs_to_create}")
 
-    for new_lang in new_langs_to_create:
-        for model in models_to_duplicate:
-            _duplicate_model_entries(model, source_lang, new_lang)
-
-
-def _duplicate_model_entries(model, source_lang, target_lang):
-    """Duplicate all entries from source_lang to target_lang for a given model."""
-    source_entries = model.objects.filter(language=source_lang)
-    model_name = model.__name__
-
-    for entry in source_entries:
-        # Check if entry already exists for target language
-        if model_name == 'Resume':
-            # Resume is unique per language
-            if model.objects.filter(language=target_lang).exists():
-                continue
-        elif hasattr(entry, 'code'):
-            # Project has unique_together on (code, language)
-            if model.objects.filter(code=entry.code, language=target_lang).exists():
-                continue
-        elif hasattr(entry, 'key'):
-            # Translation has unique_together on (key, language)
-            if model.objects.filter(key=entry.key, language=target_lang).exists():
-                continue
-
-        # Create a copy with the new language
-        entry.pk = None
-        entry.id = None
-        entry.language = target_lang
-
-        # Reset auto timestamps if present
-        if hasattr(entry, 'created_at'):
-            entry.created_at = None
-        if hasattr(entry, 'updated_at'):
-            entry.updated_at = None
-
-        try:
-            entry.save()
-            logger.debug(f"Duplicated {model_name} to '{target_lang}'")
-        except Exception as e:
-            logger.warning(f"Failed to duplicate {model_name} to '{target_lang}': {e}")
+    if settings.LANGUAGE_DUPLICATION_ASYNC:
+        # Do not hold up the admin request that saved the setting
+        start_duplication(source_lang, new_langs_to_create)
+    else:
+        duplicate_languages(source_lang, new_langs_to_create)
@@ -0,0 +1,195 @@
+"""
+Materialized snapshots of public API payloads.
+
+Each snapshot holds the final rendered JSON bytes for one endpoint and
+language, stored in the configured cache backend under the endpoint's
+generation token (see resume.invalidation). Content changes move the
+token, so stale snapshots are never read again and simply expire.
+
+Snapshots are served with a strong ETag derived from the generation token
+and a Last-Modified date of the change that moved the token, so deletes,
+settings and translations, and QuerySet.update() all advance it.
+Conditional requests are answered with 304 from the snapshot alone.
+
+Gzip and, when the brotli package is installed, brotli variants are
+compressed once when a snapshot is built and served by Accept-Encoding,
+so compression costs nothing per request. Each variant has its own ETag.
+"""
+import gzip
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are stored without it
+    brotli = None
+
+from config.renderers import UnicodeJSONRenderer
+from . import invalidation
+from .invalidation import get_cache, get_generation
+
+# Used until the api_cache_control setting is configured: clients may
+# store responses but must revalidate them, which costs a 304
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+# Preferred first when the client accepts several
+ENCODINGS = ["br", "gzip"]
+
+_cache_control_memo = (None, None)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Pre-rendered JSON payload for one endpoint and language."""
+    body: bytes
+    version: str
+    # Unix timestamp of the content change the version stems from
+    last_modified: Optional[float] = None
+    # Compressed copies of body by content coding
+    encodings: Optional[Dict[str, bytes]] = None
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def variant(self, encoding: Optional[str]):
+        """ETag and body of the variant sent with the given content coding."""
+        if encoding is None:
+            return self.etag, self.body
+        return f'"{self.version}-{encoding}"', self.encodings[encoding]
+
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    """Compressed variants of body worth sending instead of the original."""
+    if len(body) < settings.SNAPSHOT_COMPRESS_MIN_SIZE:
+        return {}
+    encodings = {"gzip": gzip.compress(body, compresslevel=settings.SNAPSHOT_GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body, quality=settings.SNAPSHOT_BROTLI_QUALITY)
+    return {encoding: data for encoding, data in encodings.items() if len(data) < len(body)}
+
+
+def make_snapshot(body: bytes, version: str) -> Snapshot:
+    return Snapshot(
+        body=body, version=version, last_modified=invalidation.changed_at(version), encodings=compress(body)
+    )
+
+
+def accepted_encoding(request, available) -> Optional[str]:
+    """Preferred content coding among `available` that the client accepts."""
+    header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    if not header or not available:
+        return None
+
+    qualities = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    for encoding in ENCODINGS:
+        if encoding in available and qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _snapshot_key(name: str, lang: str) -> str:
+    return f"snapshot:{name}:{lang}"
+
+
+def get_or_build_snapshot(name: str, lang: str, build) -> Snapshot:
+    """
+    Return the cached snapshot, building and storing it on a miss.
+
+    `build` is called without arguments and must return JSON-serializable
+    data. The generation is read before building, so content changed while the
+    payload is being assembled leaves the stored snapshot unreachable.
+    """
+    cache = get_cache()
+    version = get_generation(name, lang)
+    key = _snapshot_key(name, lang)
+
+    snapshot = cache.get(key, version=version)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = make_snapshot(UnicodeJSONRenderer().render(build()), version)
+    cache.set(key, snapshot, timeout=settings.SNAPSHOT_CACHE_TIMEOUT, version=version)
+    logger.debug(f"Built {name} snapshot for '{lang}' (version {version})")
+    return snapshot
+
+
+def get_or_build_composite(name: str, lang: str, parts, render) -> Snapshot:
+    """
+    Return the cached snapshot assembled from other snapshots, building it
+    on a miss. Its version combines the parts' versions, so it changes
+    whenever one of them does. `render` returns the body bytes.
+    """
+    cache = get_cache()
+    version = "+".join(part.version for part in parts)
+    key = _snapshot_key(name, lang)
+
+    snapshot = cache.get(key, version=version)
+    if snapshot is None:
+        snapshot = make_snapshot(render(), version)
+        cache.set(key, snapshot, timeout=settings.SNAPSHOT_CACHE_TIMEOUT, version=version)
+    return snapshot
+
+
+def get_cache_control() -> str:
+    """Cache-Control for public API payloads, from the api_cache_control setting."""
+    global _cache_control_memo
+    from .models import Setting
+
+    generation = get_generation(invalidation.SETTINGS, invalidation.ALL_LANGUAGES)
+    if _cache_control_memo[0] == generation:
+        return _cache_control_memo[1]
+    value = Setting.objects.filter(name='api_cache_control').values_list('value', flat=True).first()
+    cache_control = (value or "").strip() or DEFAULT_CACHE_CONTROL
+    _cache_control_memo = (generation, cache_control)
+    return cache_control
+
+
+def conditional_response(request, etag: str, last_modified: Optional[float], render,
+                         encoding: Optional[str] = None) -> HttpResponse:
+    """
+    JSON response with validators, or 304 Not Modified if the client's copy
+    is current. `render` returns the body, already compressed with
+    `encoding` if one is given, and is only called for a 200.
+    """
+    last_modified = int(last_modified) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(render(), content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = get_cache_control()
+    return response
+
+
+def snapshot_response(request, snapshot: Snapshot) -> HttpResponse:
+    """Serve a snapshot, or 304 Not Modified if the client's copy is current."""
+    encoding = accepted_encoding(request, snapshot.encodings)
+    etag, body = snapshot.variant(encoding)
+    response = conditional_response(request, etag, snapshot.last_modified, lambda: body, encoding)
+    if snapshot.encodings:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
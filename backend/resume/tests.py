@@ -1,3 +1,617 @@
-from django.test import TestCase
+import gc
+import gzip
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from config.instrumentation import Histogram
+from config.renderers import RawJSON, UnicodeJSONRenderer
+
+from .duplication import duplicate_language
+from . import experience
+from . import invalidation
+from .invalidation import get_cache, get_generation
+from .loader import QUERY_BUDGET, load_resume_content
+from .models import (
+    Resume, Language, Skill, Experience, Education, Certificate, Project, ContactInfo, Setting, Translation,
+    CacheInvalidation, Visit
+)
+from .serializers import (
+    RowSerializer, language_rows, skill_rows, experience_rows, education_rows,
+    certificate_rows, project_rows, contact_info_rows
+)
+from .visits import VisitBuffer, VisitEvent
+
+
+def create_content(start, count, language='en'):
+    for i in range(start, start + count):
+        Language.objects.create(name=f'Language {i}', level='B2', language=language, order=i)
+        Skill.objects.create(
+            name=f'Skill {i}', category_name='Backend', category_name_key='backend', language=language, order=i
+        )
+        Experience.objects.create(
+            company=f'Company {i}', position='Developer', start_date='Jan 2020', end_date='Present',
+            description='', language=language, order=i
+        )
+        Education.objects.create(institution=f'University {i}', degree='BSc', year='2019', language=language, order=i)
+        Certificate.objects.create(name=f'Certificate {i}', language=language, order=i)
+        Project.objects.create(code=f'project-{i}', title=f'Project {i}', description='', language=language, order=i)
+        ContactInfo.objects.create(
+            type='email', label='Email', value=f'{i}@example.com', href=f'mailto:{i}@example.com',
+            language=language, order=i
+        )
+
+
+class ResumeQueryBudgetTests(TestCase):
+    """The resume endpoint must not issue more queries as content grows."""
+
+    def setUp(self):
+        get_cache().clear()
+        Setting.objects.create(name='site_languages', value=json.dumps([
+            {'code': 'en', 'name': 'English', 'flag': ''},
+            {'code': 'ru', 'name': 'Русский', 'flag': ''},
+        ]))
+        Translation.objects.create(key='present', language='en', value='Present')
+        Translation.objects.create(key='month_1_short', language='en', value='Jan')
+        for lang in ['en', 'ru']:
+            Resume.load(lang)
+        create_content(0, 2)
+
+    def test_load_resume_content_within_budget(self):
+        with self.assertNumQueries(QUERY_BUDGET):
+            content = load_resume_content('en', ['en', 'ru'])
+        self.assertEqual(list(content.resumes), ['en', 'ru'])
+        self.assertEqual(len(content.projects), 2)
+
+    def test_query_count_does_not_grow_with_content(self):
+        create_content(2, 10)
+        with self.assertNumQueries(QUERY_BUDGET):
+            content = load_resume_content('en', ['en', 'ru'])
+        self.assertEqual(len(content.experiences), 12)
+
+    def test_get_resume_queries(self):
+        # site_languages lookup, content, the years_experience date parser
+        # and experience dates, and the api_cache_control setting
+        with self.assertNumQueries(QUERY_BUDGET + 4):
+            response = self.client.get('/api/resume/?lang=en')
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()['stats']
+        self.assertEqual(stats['projects_completed'], '2')
+        self.assertEqual(stats['languages_count'], '2')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/resume/?lang=en', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_language_is_resolved_before_caching(self):
+        english = self.client.get('/api/resume/?lang=en')
+        for lang in ['xx', 'not a language']:
+            response = self.client.get('/api/resume/', {'lang': lang})
+            self.assertEqual(response['ETag'], english['ETag'])
+            self.assertIsNone(get_cache().get(f'generation:resume:{lang}'))
+            self.assertEqual(self.client.get('/api/translations/', {'lang': lang}).status_code, 200)
+            self.assertIsNone(get_cache().get(f'generation:translations:{lang}'))
+        self.assertEqual(self.client.get('/api/bootstrap/', {'lang': 'xx'}).json()['language'], 'en')
+
+    @override_settings(SNAPSHOT_COMPRESS_MIN_SIZE=0)
+    def test_get_resume_compressed_variant(self):
+        plain = self.client.get('/api/resume/?lang=en')
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        self.assertNotIn('Content-Encoding', plain)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/resume/?lang=en', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+
+        response = self.client.get(
+            '/api/resume/?lang=en', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/resume/?lang=en', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+
+
+class ConditionalRequestTests(TestCase):
+    """Snapshots answer conditional requests and carry the configured Cache-Control."""
+
+    def setUp(self):
+        get_cache().clear()
+        Setting.objects.create(name='site_languages', value=json.dumps([{'code': 'en', 'name': 'English', 'flag': ''}]))
+        Translation.objects.create(key='present', language='en', value='Present')
+        Resume.load('en')
+        create_content(0, 2)
+
+    def later(self):
+        """Changes made in it are stamped seconds after the previous ones, past Last-Modified's resolution."""
+        self.clock = max(getattr(self, 'clock', 0), time.time_ns()) + 2_000_000_000
+        return mock.patch('resume.invalidation.time.time_ns', return_value=self.clock)
+
+    def test_if_none_match(self):
+        for url in ['/api/resume/?lang=en', '/api/translations/?lang=en', '/api/settings/']:
+            etag = self.client.get(url)['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_if_modified_since_after_changes(self):
+        changes = [
+            lambda: Skill.objects.filter(pk=Skill.objects.first().pk).delete(),
+            lambda: Translation.objects.filter(key='present').update(value='Now'),
+            lambda: Project.objects.filter(language='en').update(title='Renamed'),
+        ]
+        for change in changes:
+            last_modified = self.client.get('/api/resume/?lang=en')['Last-Modified']
+            response = self.client.get('/api/resume/?lang=en', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 304)
+
+            with self.later(), self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.client.get('/api/resume/?lang=en', HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_cache_control_from_setting(self):
+        self.assertEqual(self.client.get('/api/resume/?lang=en')['Cache-Control'], 'no-cache')
+        with self.captureOnCommitCallbacks(execute=True):
+            Setting.objects.create(name='api_cache_control', value='public, max-age=60')
+        for url in ['/api/resume/?lang=en', '/api/translations/?lang=en', '/api/bootstrap/']:
+            self.assertEqual(self.client.get(url)['Cache-Control'], 'public, max-age=60')
+
+
+class RowSerializerParityTests(TestCase):
+    """The values() fast path must render exactly like the ModelSerializers."""
+
+    def setUp(self):
+        create_content(0, 3)
+        Language.objects.create(name='Русский', level='Родной', proficiency=100, language='en', order=5)
+        Education.objects.create(
+            institution='清华大学', location='Beijing, China', degree='MSc', faculty='Computer Science',
+            year='2021', language='en', order=5
+        )
+        Certificate.objects.create(name='AWS "Solutions" Architect', year='2023', language='en', order=5)
+        Project.objects.create(
+            code='emoji', title='Emoji 🚀 project', description='Line one\nline two', link='https://example.com/',
+            technologies=['Python', 'Django', 'Next.js', 'ünïcode'], language='en', order=5
+        )
+
+    def test_rows_match_model_serializers(self):
+        renderer = UnicodeJSONRenderer()
+        for rows in [language_rows, skill_rows, experience_rows, education_rows,
+                     certificate_rows, project_rows, contact_info_rows]:
+            with self.subTest(model=rows.model.__name__):
+                queryset = rows.model.objects.filter(language='en')
+                expected = rows.serializer_class(queryset, many=True).data
+                actual = rows.serialize(queryset)
+                self.assertEqual(actual, expected)
+                self.assertEqual(renderer.render(actual), renderer.render(expected))
+
+    def test_rejects_computed_fields(self):
+        class ComputedSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Project
+                fields = ['id', 'label']
+
+        with self.assertRaises(ImproperlyConfigured):
+            RowSerializer(ComputedSerializer)
+
+
+class RendererTests(TestCase):
+    """orjson and the stdlib encoder render API payloads to the same bytes."""
+
+    def render(self, data, renderer='auto'):
+        with override_settings(JSON_RENDERER=renderer):
+            return UnicodeJSONRenderer().render(data)
+
+    def test_resume_payload_is_identical(self):
+        from .views import build_resume_payload
+
+        Resume.objects.create(language='en', firstname='Zoë', lastname='Ли 🚀', about_me='Line\nbreak "quoted"')
+        create_content(0, 5)
+        payload = build_resume_payload('en', ['en'])
+        self.assertEqual(self.render(payload), self.render(payload, 'stdlib'))
+        self.assertEqual(json.loads(self.render(payload)), json.loads(json.dumps(payload)))
+
+    def test_raw_json_is_spliced(self):
+        fragment = RawJSON('{"name":"Zoë","tags":["a"]}'.encode())
+        for renderer in ['auto', 'stdlib']:
+            with self.subTest(renderer):
+                self.assertEqual(self.render(fragment, renderer), fragment)
+                self.assertEqual(
+                    self.render({'a': fragment, 'b': [fragment, 1]}, renderer),
+                    b'{"a":' + fragment + b',"b":[' + fragment + b',1]}',
+                )
+
+    def test_big_integers_fall_back_to_stdlib(self):
+        fragment = RawJSON(b'[1]')
+        data = {'big': 2 ** 64, 'small': -2 ** 63 - 1, 'raw': fragment}
+        self.assertEqual(self.render(data), b'{"big":18446744073709551616,"small":-9223372036854775809,"raw":[1]}')
+
+    def test_stdlib_renderer(self):
+        with mock.patch('config.renderers.orjson.dumps') as dumps:
+            self.assertEqual(self.render({'x': 'ю'}, 'stdlib'), '{"x":"ю"}'.encode())
+            dumps.assert_not_called()
+            self.render({'x': 'ю'})
+            dumps.assert_called_once()
+
+
+class LanguageDuplicationTests(TestCase):
+    """New languages are filled with a fixed number of bulk queries."""
+
+    def setUp(self):
+        Resume.load('en')
+        Translation.objects.create(key='present', language='en', value='Present')
+        create_content(0, 5)
+
+    def test_dry_run_writes_nothing(self):
+        report = duplicate_language('en', 'de', dry_run=True)
+        self.assertEqual(report.created, 1 + 7 * 5 + 1)
+        self.assertFalse(Project.objects.filter(language='de').exists())
+
+    def test_duplicates_in_bulk_once(self):
+        Translation.objects.create(key='present', language='de', value='Aktuell')
+        # Per model: source rows, target keys and one INSERT, within a savepoint
+        with self.assertNumQueries(9 * 3 - 1 + 2):
+            report = duplicate_language('en', 'de')
+        self.assertEqual(report.created, 1 + 7 * 5)
+        self.assertEqual(report.skipped, 1)
+        self.assertEqual(Translation.objects.get(key='present', language='de').value, 'Aktuell')
+        self.assertEqual(Project.objects.filter(language='de').count(), 5)
+
+        report = duplicate_language('en', 'de')
+        self.assertEqual(report.created, 0)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class InstrumentationTests(TestCase):
+    """Request metrics are recorded per view and exported for Prometheus."""
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_metrics_endpoint(self):
+        self.client.get('/api/settings/')
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds_count{view="get_settings",method="GET"}', body)
+        self.assertIn('http_request_db_queries_bucket{view="get_settings",method="GET",le="+Inf"}', body)
+
+    def test_shards_of_finished_threads_are_folded(self):
+        histogram = Histogram('test_seconds', 'Test', (1, 2))
+        labels = (('view', 'test'),)
+        threads = [threading.Thread(target=histogram.observe, args=(labels, 1.5)) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertEqual(histogram._shards, [])
+        self.assertEqual(histogram.collect(), {labels: [0, 50, 0, 75.0]})
+
+    @override_settings(INSTRUMENTATION_QUERY_BUDGET=0)
+    def test_flags_requests_over_query_budget(self):
+        with self.assertLogs('config.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/translations/?lang=en')
+        self.assertIn('get_translations ran', logs.output[0])
+
+
+@override_settings(WHITENOISE_AUTOREFRESH=True, WHITENOISE_USE_FINDERS=True)
+class StaticFilesTests(TestCase):
+    """WhiteNoise serves static files under WSGI and natively under ASGI."""
+
+    path = '/static/admin/css/base.css'
+
+    def test_wsgi(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'body', b''.join(response.streaming_content))
+
+    async def test_asgi(self):
+        from config.middleware import WhiteNoiseMiddleware
+
+        with mock.patch.object(WhiteNoiseMiddleware, '__acall__', autospec=True,
+                               side_effect=WhiteNoiseMiddleware.__acall__) as acall:
+            response = await self.async_client.get(self.path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/css; charset="utf-8"')
+            # Other requests go on down the stack
+            response = await self.async_client.get('/api/settings/')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(acall.call_count, 2)
+
+    def test_async_mode_follows_the_stack(self):
+        from asgiref.sync import iscoroutinefunction
+        from config.middleware import WhiteNoiseMiddleware
+
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(WhiteNoiseMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(WhiteNoiseMiddleware(lambda request: None)))
+
+
+class InvalidationTests(TestCase):
+    """Content changes move the generation of exactly the affected endpoints and languages."""
+
+    def setUp(self):
+        get_cache().clear()
+        for language in ['en', 'ru']:
+            Skill.objects.create(name=f'Python {language}', category_name='Backend', category_name_key='backend',
+                                 language=language, order=1)
+
+    def generations(self):
+        return {language: get_generation(invalidation.RESUME, language) for language in ['en', 'ru']}
+
+    def assertBumped(self, before, languages):
+        after = self.generations()
+        self.assertEqual({language for language in after if after[language] != before[language]}, set(languages))
+
+    def test_update_bumps_affected_language_on_commit(self):
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.filter(language='ru').update(order=5)
+            self.assertBumped(before, [])
+        self.assertBumped(before, ['ru'])
+
+    def test_update_moving_rows_bumps_both_languages(self):
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.filter(language='en').update(language='ru')
+        self.assertBumped(before, ['en', 'ru'])
+
+    def test_bulk_create_bumps_created_languages(self):
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.bulk_create([Skill(name='Go', category_name='Backend', category_name_key='backend',
+                                             language='ru', order=2)])
+        self.assertBumped(before, ['ru'])
+
+    def test_bulk_update_bumps_updated_languages(self):
+        skills = list(Skill.objects.filter(language='en'))
+        for skill in skills:
+            skill.order = 7
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.bulk_update(skills, ['order'])
+        self.assertBumped(before, ['en'])
+
+    def test_admin_bulk_actions_bump_affected_language(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        skill = Skill.objects.get(language='ru')
+        before = self.generations()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/resume/skill/', {
+                'action': 'delete_selected', '_selected_action': [skill.pk], 'post': 'yes',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Skill.objects.filter(pk=skill.pk).exists())
+        self.assertBumped(before, ['ru'])
+
+    def test_log_applies_bumps_from_other_processes(self):
+        log = invalidation.InvalidationLog()
+        log.polling = True
+        log.poll()
+        en, ru = get_generation(invalidation.RESUME, 'en'), get_generation(invalidation.RESUME, 'ru')
+
+        # Recorded by a management command in another process
+        CacheInvalidation.objects.create(endpoint=invalidation.RESUME, language='ru')
+        self.assertEqual(log.poll(), 1)
+        self.assertNotEqual(get_generation(invalidation.RESUME, 'ru'), ru)
+        self.assertEqual(get_generation(invalidation.RESUME, 'en'), en)
+
+        # Bumps this process recorded itself were applied already
+        log.record({(invalidation.RESUME, 'en')})
+        self.assertEqual(log.poll(), 0)
+
+
+class YearsExperienceTests(TestCase):
+    """years_experience merges overlapping periods and parses dates in any language."""
+
+    def setUp(self):
+        get_cache().clear()
+        for key, en, ru in [
+            ('month_3_full', 'march', 'март'), ('month_3_short', 'mar', 'мар'),
+            ('month_5_full', 'may', 'май'), ('month_5_short', 'may', 'май'),
+            ('month_8_full', 'august', 'август'), ('month_8_short', 'aug', 'авг'),
+            ('present', 'present', 'настоящее время'),
+        ]:
+            Translation.objects.create(key=key, language='en', value=en.capitalize())
+            Translation.objects.create(key=key, language='ru', value=ru.capitalize())
+        self.parser = experience.DateParser.compile()
+        self.now = datetime(2024, 6, 15)
+
+    def months(self, *periods):
+        return experience.total_months(
+            (self.parser.parse(start, self.now), self.parser.parse(end, self.now)) for start, end in periods
+        )
+
+    def test_month_names_match_by_longest_prefix(self):
+        for text, month in [
+            ('Mar 2020', 3), ('March 2020', 3), ('Май 2020', 5), ('Марта 2020', 3), ('Авг 2020', 8),
+            ('August 2020', 8),
+            # Not a complete name in any language; English abbreviations, then January
+            ('Ma 2020', 1), ('Oct 2020', 10), ('Smarch 2020', 1),
+        ]:
+            with self.subTest(text):
+                self.assertEqual(self.parser.parse(text, self.now), datetime(2020, month, 1))
+
+    def test_present_and_empty_mean_now(self):
+        for text in ['Present', 'PRESENT', 'Настоящее время', '']:
+            with self.subTest(text):
+                self.assertEqual(self.parser.parse(text, self.now), self.now)
+        self.assertEqual(self.parser.parse('2019', self.now), datetime(2019, 1, 1))
+
+    def test_periods_are_merged(self):
+        for periods, months in [
+            # Overlapping: Jan 2020 - Jan 2022
+            ((('Jan 2020', 'Jan 2021'), ('Mar 2020', 'Jan 2022')), 24),
+            # Nested
+            ((('Jan 2020', 'Jan 2022'), ('Mar 2020', 'Aug 2020')), 24),
+            # Adjacent
+            ((('Jan 2020', 'Jan 2021'), ('Jan 2021', 'Jan 2022')), 24),
+            # Disjoint
+            ((('Jan 2020', 'Jan 2021'), ('Mar 2021', 'Mar 2022')), 24),
+            # Reversed periods are dropped
+            ((('Jan 2022', 'Jan 2020'), ('Jan 2020', 'Aug 2020')), 7),
+            # Ongoing, Russian dates
+            ((('Авг 2023', 'Настоящее время'), ('Май 2024', 'Present')), 10),
+        ]:
+            with self.subTest(periods):
+                self.assertEqual(self.months(*periods), months)
+
+    def test_format_years(self):
+        self.assertEqual(experience.format_years(0), '0+')
+        self.assertEqual(experience.format_years(11), '11+')
+        self.assertEqual(experience.format_years(30), '2+')
+
+    def test_memo_recomputed_after_changes(self):
+        Experience.objects.create(company='A', position='Developer', start_date='Jan 2020', end_date='Smarch 2020',
+                                  description='', language='en', order=1)
+        self.assertEqual(experience.get_years_experience(), '0+')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.create(key='month_12_full', language='en', value='Smarch')
+        self.assertEqual(experience.get_years_experience(), '11+')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Experience.objects.create(company='B', position='Developer', start_date='Jan 2021',
+                                      end_date='Jan 2023', description='', language='en', order=2)
+        self.assertEqual(experience.get_years_experience(), '2+')
+
+        # Other languages do not count
+        with self.captureOnCommitCallbacks(execute=True):
+            Experience.objects.create(company='C', position='Developer', start_date='Jan 2000',
+                                      end_date='Jan 2023', description='', language='ru', order=1)
+        self.assertEqual(experience.get_years_experience(), '2+')
+
+
+class VisitBufferTests(TestCase):
+    """Visits are coalesced per session in memory and written in bulk."""
+
+    def setUp(self):
+        # No writer thread or exit hook; the tests flush themselves
+        self.thread = self.patch('resume.visits.threading.Thread')
+        self.register = self.patch('resume.visits.atexit.register')
+        self.start = timezone.now()
+
+    def patch(self, target):
+        patcher = mock.patch(target)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def event(self, session_id, minutes=0, page='/'):
+        return VisitEvent(session_id=session_id, ip_address='127.0.0.1', user_agent='test', referer=None,
+                          page=page, seen_at=self.start + timedelta(minutes=minutes))
+
+    def test_repeat_visits_are_coalesced(self):
+        buffer = VisitBuffer()
+        for minutes, page in enumerate(['/', '/projects', '/contact']):
+            buffer.record(self.event('a', minutes, page))
+        with self.assertNumQueries(2):
+            self.assertEqual(buffer.flush(), 1)
+        visit = Visit.objects.get()
+        self.assertEqual((visit.session_id, visit.page), ('a', '/'))
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_existing_sessions_are_updated_new_ones_created(self):
+        existing = Visit.objects.create(session_id='a', ip_address='127.0.0.1', user_agent='test', page='/')
+        buffer = VisitBuffer()
+        buffer.record(self.event('a', 30))
+        buffer.record(self.event('b', 30))
+        buffer.record(self.event('c', 30))
+        # SELECT, bulk UPDATE, bulk INSERT
+        with self.assertNumQueries(3):
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(Visit.objects.count(), 3)
+        existing.refresh_from_db()
+        self.assertEqual(existing.last_visit, self.start + timedelta(minutes=30))
+
+    def test_flush_size_wakes_the_writer(self):
+        buffer = VisitBuffer(flush_size=3)
+        buffer.record(self.event('a'))
+        buffer.record(self.event('b'))
+        buffer.record(self.event('a', 1))
+        self.assertFalse(buffer._wake.is_set())
+        buffer.record(self.event('c'))
+        self.assertTrue(buffer._wake.is_set())
+
+    def test_sessions_over_the_limit_are_dropped(self):
+        buffer = VisitBuffer(max_sessions=2)
+        for session_id in ['a', 'b', 'c', 'a', 'd']:
+            buffer.record(self.event(session_id))
+        self.assertEqual(buffer.dropped, 2)
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(set(Visit.objects.values_list('session_id', flat=True)), {'a', 'b'})
+        # Flushing makes room again
+        buffer.record(self.event('c'))
+        self.assertEqual(buffer.flush(), 1)
+
+    def test_pending_visits_are_flushed_at_exit(self):
+        buffer = VisitBuffer()
+        buffer.record(self.event('a'))
+        buffer.record(self.event('b'))
+        # The writer and its exit hook are set up once, on the first visit
+        self.thread.assert_called_once()
+        self.register.assert_called_once_with(buffer.flush)
+        exit_hook = self.register.call_args.args[0]
+        self.assertEqual(exit_hook(), 2)
+        self.assertEqual(Visit.objects.count(), 2)
+        self.assertEqual(exit_hook(), 0)
+
+    def test_failed_writes_are_logged(self):
+        buffer = VisitBuffer()
+        buffer.record(self.event('a'))
+        with mock.patch.object(VisitBuffer, '_write', side_effect=RuntimeError('database is locked')), \
+                self.assertLogs('resume.visits', 'WARNING'):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertFalse(Visit.objects.exists())
+
+
+class SeedDataTests(TestCase):
+    """seed_data --scale adds synthetic rows in bulk, spread over the last 90 days."""
+
+    def seed(self, **options):
+        call_command('seed_data', scale=2, languages=2, visits=30, chat_logs=10, stdout=StringIO(), **options)
+
+    def test_scale(self):
+        from ai.models import AIChatLog
+
+        before = timezone.now()
+        self.seed()
+        codes = [language['code'] for language in json.loads(Setting.objects.get(name='site_languages').value)]
+        self.assertEqual(codes[-2:], ['x01', 'x02'])
+        self.assertEqual(set(Resume.objects.values_list('language', flat=True)), set(codes))
+        for model in [Experience, Skill]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(model.objects.filter(language='x01').count(), 2)
+        self.assertEqual(Project.objects.filter(code__startswith='synthetic-').count(), 2 * len(codes))
+
+        oldest = before - timedelta(days=90)
+        visits = list(Visit.objects.values_list('first_visit', 'last_visit'))
+        self.assertEqual(len(visits), 30)
+        for first_visit, last_visit in visits:
+            self.assertTrue(oldest <= first_visit == last_visit <= timezone.now())
+        self.assertGreater(len({first_visit.date() for first_visit, _ in visits}), 1)
+        timestamps = AIChatLog.objects.values_list('timestamp', flat=True)
+        self.assertEqual(len(timestamps), 10)
+        self.assertTrue(all(oldest <= timestamp <= timezone.now() for timestamp in timestamps))
+
+        # Later runs add rows, numbered after the earlier ones
+        self.seed()
+        self.assertEqual(Project.objects.filter(code__startswith='synthetic-').count(), 4 * len(codes))
+        self.assertEqual(Visit.objects.count(), 60)
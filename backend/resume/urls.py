@@ -6,5 +6,6 @@ urlpatterns = [
     path("settings/", views.get_settings, name="get_settings"),
     path("translations/", views.get_translations, name="get_translations"),
     path("csrf/", views.get_csrf_token, name="get_csrf_token"),
+    path("bootstrap/", views.get_bootstrap, name="get_bootstrap"),
 ]
 
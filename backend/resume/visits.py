@@ -0,0 +1,164 @@
+"""
+Write-behind buffer for visit tracking.
+
+Requests only record a visit event in memory. A background thread flushes
+the buffer every VISIT_FLUSH_INTERVAL seconds, or sooner once
+VISIT_FLUSH_SIZE sessions are waiting. Events are coalesced per session,
+so a flush costs one SELECT, one bulk UPDATE and one bulk INSERT however
+many pages were viewed.
+"""
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import Visit
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VisitEvent:
+    session_id: str
+    ip_address: str
+    user_agent: str
+    referer: Optional[str]
+    page: str
+    seen_at: datetime
+
+
+class VisitBuffer:
+    """Coalesces visit events per session and writes them in bulk."""
+
+    def __init__(self, interval: float = 5.0, flush_size: int = 100, max_sessions: int = 10000):
+        self.interval = interval
+        self.flush_size = flush_size
+        self.max_sessions = max_sessions
+        # First event of each session, with seen_at moved to the latest one
+        self._pending: Dict[str, VisitEvent] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def record(self, event: VisitEvent):
+        """Queue a visit; never touches the database."""
+        with self._lock:
+            pending = self._pending.get(event.session_id)
+            if pending is not None:
+                pending.seen_at = event.seen_at
+            elif len(self._pending) >= self.max_sessions:
+                # The database is not keeping up; shed load instead of memory
+                self.dropped += 1
+                return
+            else:
+                self._pending[event.session_id] = event
+            size = len(self._pending)
+            if self._thread is None:
+                self._start()
+        if size >= self.flush_size:
+            self._wake.set()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="visit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all queued visits; returns the number of sessions written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._pending = self._pending, {}
+            if not events:
+                return 0
+            try:
+                self._write(events)
+            except Exception as e:
+                logger.warning(f"Visit tracking error: {e}")
+                return 0
+            finally:
+                if threading.current_thread() is self._thread:
+                    connections.close_all()
+            return len(events)
+
+    @staticmethod
+    def _write(events: Dict[str, VisitEvent]):
+        # Latest visit per session, as Visit.objects.filter(...).first() finds it
+        existing = {}
+        for pk, session_id in (
+            Visit.objects.filter(session_id__in=list(events))
+            .order_by('-last_visit')
+            .values_list('pk', 'session_id')
+        ):
+            existing.setdefault(session_id, pk)
+
+        updates = [
+            Visit(pk=pk, last_visit=events[session_id].seen_at)
+            for session_id, pk in existing.items()
+        ]
+        if updates:
+            Visit.objects.bulk_update(updates, ['last_visit'])
+
+        inserts = [
+            Visit(
+                session_id=event.session_id,
+                ip_address=event.ip_address,
+                user_agent=event.user_agent,
+                referer=event.referer,
+                page=event.page,
+            )
+            for session_id, event in events.items()
+            if session_id not in existing
+        ]
+        if inserts:
+            Visit.objects.bulk_create(inserts)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_visit_buffer() -> VisitBuffer:
+    """Return the process-wide visit buffer."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = VisitBuffer(
+                    interval=settings.VISIT_FLUSH_INTERVAL,
+                    flush_size=settings.VISIT_FLUSH_SIZE,
+                    max_sessions=settings.VISIT_BUFFER_MAX_SESSIONS,
+                )
+    return _buffer
+
+
+def record_visit(session_id, ip_address, user_agent, referer, page):
+    """
+    Track a visit. With VISIT_WRITE_BEHIND off the visit is written
+    before returning, otherwise it is queued for the background writer.
+    """
+    event = VisitEvent(
+        session_id=session_id,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        referer=referer,
+        page=page,
+        seen_at=timezone.now(),
+    )
+    if settings.VISIT_WRITE_BEHIND:
+        get_visit_buffer().record(event)
+    else:
+        VisitBuffer._write({session_id: event})
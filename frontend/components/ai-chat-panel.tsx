@@ -7,7 +7,7 @@ import { Input } from "@/components/ui/input"
 import { Send, Bot, User } from "lucide-react"
 import { cn } from "@/lib/utils"
 import { useApp } from "@/context/app-context"
-import { sendChatMessage } from "@/lib/api"
+import { streamChatMessage } from "@/lib/api"
 import ReactMarkdown from "react-markdown"
 import remarkGfm from "remark-gfm"
 
@@ -91,23 +91,22 @@ export function AIChatPanel({ isOpen, onClose }: AIChatPanelProps) {
     setIsLoading(true)
 
     try {
-      const welcomeMsg = getWelcomeMessage()
-      const chatHistory = messages
-        .filter((msg) => msg.role !== "assistant" || msg.content !== welcomeMsg)
-        .map((msg) => ({
-          role: msg.role === "user" ? "user" : "model",
-          parts: [msg.content],
-        }))
-
-      const response = await sendChatMessage(userMessage, chatHistory, sessionId, language)
-      
-      setMessages((prev) => [
-        ...prev,
-        {
-          role: "assistant",
-          content: response.response,
-        },
-      ])
+      // Show the answer as it streams in, replacing a single assistant message
+      let started = false
+      const showPartial = (content: string) => {
+        const isFirstChunk = !started
+        started = true
+        setMessages((prev) => [
+          ...(isFirstChunk ? prev : prev.slice(0, -1)),
+          { role: "assistant", content },
+        ])
+      }
+
+      // The server keeps the conversation for this session, so only the new message is sent
+      const response = await streamChatMessage(userMessage, [], sessionId, language, showPartial)
+      if (!started) {
+        showPartial(response.response || t("aiChatError"))
+      }
     } catch (error: any) {
       console.error("Error sending message:", error)
       const errorMessage = error?.errorType === 'NO_API_KEY' 
@@ -1,8 +1,8 @@
 "use client"
 
-import { createContext, useContext, useState, useEffect, type ReactNode } from "react"
+import { createContext, useContext, useState, useEffect, useRef, type ReactNode } from "react"
 import { type Language, type Translations } from "@/lib/types"
-import { fetchResume, fetchCsrfToken, type ResumeData, type SiteLanguage, type Settings } from "@/lib/api"
+import { fetchBootstrap, fetchResume, type ResumeData, type SiteLanguage } from "@/lib/api"
 import { API_BASE_URL } from "@/lib/constants"
 
 interface AppContextType {
@@ -102,6 +102,8 @@ export function AppProvider({ children }: { children: ReactNode }) {
   const [translations, setTranslations] = useState<Translations>({})
   const [siteLanguages, setSiteLanguages] = useState<SiteLanguage[]>([])
   const [defaultLanguage, setDefaultLanguage] = useState<string>("en")
+  // Language whose translations and resume are loaded or being loaded
+  const loadedLanguage = useRef<string | null>(null)
 
   useEffect(() => {
     setMounted(true)
@@ -113,13 +115,9 @@ export function AppProvider({ children }: { children: ReactNode }) {
     document.documentElement.classList.toggle("dark", initialTheme === "dark")
     document.documentElement.setAttribute("data-color-scheme", "blue")
 
-    // Fetch CSRF token for POST requests
-    fetchCsrfToken()
-
-    // Load settings first to get default language and site languages
-    fetch(`${API_BASE_URL}/api/settings/`, { credentials: "include" })
-      .then((res) => res.json())
-      .then((data: Settings) => {
+    // Load settings, translations and resume in one request (also sets the CSRF cookie)
+    fetchBootstrap(savedLanguage)
+      .then(({ language: initialLang, settings: data, translations: translationsData, resume }) => {
         if (data.theme) {
           setColorScheme(data.theme)
           applyTheme(data.theme)
@@ -130,60 +128,30 @@ export function AppProvider({ children }: { children: ReactNode }) {
           setSiteLanguages(data.site_languages)
         }
 
-        // Determine initial language: saved > default from settings > first available > "en"
+        // Initial language: saved > default from settings > first available > "en"
         const settingsDefaultLang = data.default_language || (data.site_languages?.[0]?.code) || "en"
         setDefaultLanguage(settingsDefaultLang)
 
-        const initialLang = savedLanguage || settingsDefaultLang
-        setLanguage(initialLang)
+        setTranslations(translationsData)
+        setResumeData(resume)
+        setResumeError(null)
 
-        // Load translations
-        fetch(`${API_BASE_URL}/api/translations/?lang=${initialLang}`, { credentials: "include" })
-          .then((res) => res.json())
-          .then((translationsData) => {
-            setTranslations(translationsData)
-          })
-          .catch((error) => {
-            console.error("Failed to fetch translations:", error)
-          })
-
-        // Load resume
-        fetchResume(initialLang)
-          .then((resumeDataResponse) => {
-            setResumeData(resumeDataResponse)
-            setResumeError(null)
-          })
-          .catch((error) => {
-            console.error("Failed to fetch resume data:", error)
-            setResumeError(error instanceof Error ? error : new Error("Failed to load resume"))
-          })
+        // Already loaded, so the language effect does not fetch it again
+        loadedLanguage.current = initialLang
+        setLanguage(initialLang)
       })
       .catch((error) => {
-        console.error("Failed to fetch settings:", error)
-        // Fallback if settings fail
-        const initialLang = savedLanguage || "en"
-        setLanguage(initialLang)
+        console.error("Failed to fetch bootstrap data:", error)
+        // Fallback: the language effect loads translations and resume
+        setLanguage(savedLanguage || "en")
         setDefaultLanguage("en")
-
-        fetch(`${API_BASE_URL}/api/translations/?lang=${initialLang}`)
-          .then((res) => res.json())
-          .then((data) => setTranslations(data))
-          .catch((err) => console.error("Failed to fetch translations:", err))
-
-        fetchResume(initialLang)
-          .then((data) => {
-            setResumeData(data)
-            setResumeError(null)
-          })
-          .catch((err) => {
-            console.error("Failed to fetch resume data:", err)
-            setResumeError(err instanceof Error ? err : new Error("Failed to load resume"))
-          })
       })
   }, [])
 
   useEffect(() => {
-    if (mounted) {
+    if (mounted && language && language !== loadedLanguage.current) {
+      loadedLanguage.current = language
+
       // Load resume data
       fetchResume(language)
         .then((data) => {
@@ -192,6 +160,7 @@ export function AppProvider({ children }: { children: ReactNode }) {
         })
         .catch((error) => {
           console.error("Failed to fetch resume data:", error)
+          setResumeError(error instanceof Error ? error : new Error("Failed to load resume"))
         })
       
       // Load translations
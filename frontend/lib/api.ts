@@ -1,4 +1,5 @@
 import { API_BASE_URL, API_ENDPOINTS } from "./constants"
+import { type Translations } from "./types"
 
 // Get CSRF token from cookie
 function getCookie(name: string): string | null {
@@ -127,6 +128,29 @@ export interface Settings {
   [key: string]: unknown
 }
 
+export interface BootstrapData {
+  language: string
+  settings: Settings
+  translations: Translations
+  resume: ResumeData
+}
+
+// Settings, translations and resume in one request; also sets the CSRF cookie.
+// Without a language the site's default language is used.
+export async function fetchBootstrap(lang?: string | null): Promise<BootstrapData> {
+  const query = lang ? `?lang=${lang}` : ""
+  const response = await fetch(`${API_BASE_URL}${API_ENDPOINTS.BOOTSTRAP}${query}`, {
+    method: "GET",
+    credentials: "include",
+  })
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch bootstrap data: ${response.statusText}`)
+  }
+
+  return response.json()
+}
+
 export async function fetchResume(lang: string = "en"): Promise<ResumeData> {
   const response = await fetch(`${API_BASE_URL}${API_ENDPOINTS.RESUME}?lang=${lang}`, {
     method: "GET",
@@ -184,3 +208,81 @@ export async function sendChatMessage(
   return response.json()
 }
 
+export async function streamChatMessage(
+  message: string,
+  chatHistory: Array<{ role: string; parts: string[] }> = [],
+  sessionId: string | undefined,
+  language: string = "en",
+  onDelta: (text: string) => void
+): Promise<{ response: string; session_id: string }> {
+  const csrftoken = getCookie('csrftoken')
+  const headers: Record<string, string> = {
+    "Content-Type": "application/json",
+    Accept: "text/event-stream",
+  }
+  if (csrftoken) {
+    headers["X-CSRFToken"] = csrftoken
+  }
+
+  const response = await fetch(`${API_BASE_URL}${API_ENDPOINTS.AI_CHAT_STREAM}`, {
+    method: "POST",
+    headers,
+    credentials: "include",
+    body: JSON.stringify({
+      message,
+      chat_history: chatHistory,
+      session_id: sessionId,
+      language,
+    }),
+  })
+
+  if (!response.ok || !response.body) {
+    let errorData: { error?: string } = {};
+    try {
+      errorData = await response.json()
+    } catch {
+      errorData = { error: `Failed to send chat message: ${response.statusText}` }
+    }
+    const error = new Error(errorData.error || `Failed to send chat message: ${response.statusText}`)
+    ;(error as any).errorType = errorData.error === 'No API key' ? 'NO_API_KEY' : 'GENERAL'
+    throw error
+  }
+
+  // Parse server-sent events: "event: <name>\ndata: <json>\n\n"
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+  let text = ""
+  let finalSessionId = sessionId || ""
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf("\n\n")
+    while (boundary !== -1) {
+      const rawEvent = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf("\n\n")
+
+      let eventName = "message"
+      let data = ""
+      for (const line of rawEvent.split("\n")) {
+        if (line.startsWith("event: ")) eventName = line.slice(7)
+        else if (line.startsWith("data: ")) data += line.slice(6)
+      }
+      if (!data) continue
+
+      const payload = JSON.parse(data)
+      if (eventName === "done") {
+        finalSessionId = payload.session_id || finalSessionId
+      } else if (payload.delta) {
+        text += payload.delta
+        onDelta(text)
+      }
+    }
+  }
+
+  return { response: text, session_id: finalSessionId }
+}
@@ -3,6 +3,8 @@ export const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL;
 export const API_ENDPOINTS = {
   RESUME: "/api/resume/",
   AI_CHAT: "/api/ai/chat/",
+  AI_CHAT_STREAM: "/api/ai/chat/stream/",
   CSRF: "/api/csrf/",
+  BOOTSTRAP: "/api/bootstrap/",
 } as const
 